@@ -2,30 +2,97 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import timedelta
+from datetime import datetime, timedelta
 import logging
-from typing import Any
+from typing import Any, Callable
 
-from aiohttp import ClientConnectionError
+from aiohttp import ClientConnectionError, ClientResponseError
 from async_timeout import timeout
-from pymelcloud import Device, get_devices
+from pymelcloud import DEVICE_TYPE_ATA, DEVICE_TYPE_ATW, AtwDevice, Device
+from pymelcloud.client import Client
+from pymelcloud.device import EFFECTIVE_FLAGS, HAS_PENDING_COMMAND, PROPERTY_POWER
 import voluptuous as vol
 
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
-from homeassistant.const import CONF_TOKEN, CONF_USERNAME
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.const import CONF_SCAN_INTERVAL, CONF_TOKEN, CONF_USERNAME
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC
-from homeassistant.util import Throttle
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+import homeassistant.util.dt as dt_util
 
-from .const import DOMAIN
+from .account import (
+    MelCloudAccount,
+    async_fetch_device_state,
+    conf_key,
+    devices_from_confs,
+    is_overload_error,
+    restore_discovery,
+    state_from_conf,
+)
+from .auth import AuthManager, is_auth_error
+from .backoff import STATE_CLOSED, CircuitBreaker
+from .cache import InventoryCache, restore_client, restore_device
+from .const import (
+    CONF_BURST,
+    CONF_CONF_UPDATE_INTERVAL,
+    CONF_RATE_LIMIT,
+    CONF_REFRESH_MODE,
+    CONF_WRITE_DEBOUNCE,
+    DATA_DISCOVERY,
+    DEFAULT_BURST,
+    DEFAULT_CONF_UPDATE_INTERVAL,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_REFRESH_MODE,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_WRITE_DEBOUNCE,
+    DEVICE_BACKOFF_BASE,
+    DEVICE_CIRCUIT_PROBE_INTERVAL,
+    DEVICE_CIRCUIT_THRESHOLD,
+    DOMAIN,
+    MAX_BACKOFF,
+    OPTIMISTIC_STATE_TIMEOUT,
+    QUEUED_WRITE_TIMEOUT,
+    REQUEST_TIMEOUT,
+    SIGNAL_DEVICES_ADDED,
+    UNREACHABLE_GRACE,
+)
+from .coordinator import MelCloudCoordinator
+from .limiter import RequestLimiter
+from .metrics import KIND_WRITE, RequestMetrics
+from .snapshot import DeviceSnapshot, take_snapshot
+from .util import SingleFlight
 
 _LOGGER = logging.getLogger(__name__)
 
-MIN_TIME_BETWEEN_UPDATES = timedelta(seconds=60)
+# Platforms with entities for each device type. Only the platforms of the
+# device types on the account are loaded.
+DEVICE_PLATFORMS = {
+    DEVICE_TYPE_ATA: ["climate", "sensor"],
+    DEVICE_TYPE_ATW: ["climate", "sensor", "water_heater"],
+}
+
+# Rate limiters shared by the config entries of a login.
+DATA_LIMITERS = f"{DOMAIN}_limiters"
+
+_VOLATILE_STATE_KEYS = {"LastCommunication", "NextCommunication", "LastTimeStamp"}
+
+ZONE_INDEXES = (1, 2)
+
+
+def _fingerprint(values: dict[str, Any], skip: tuple[str, ...] = ()) -> tuple:
+    """Return the scalar values entities are built from as a comparable tuple."""
+    return tuple(
+        sorted(
+            (key, value)
+            for key, value in values.items()
+            if key not in _VOLATILE_STATE_KEYS
+            and not isinstance(value, (dict, list))
+            and not any(part in key for part in skip)
+        )
+    )
 
-PLATFORMS = ["climate", "sensor", "water_heater"]
 
 CONF_LANGUAGE = "language"
 CONFIG_SCHEMA = vol.Schema(
@@ -64,16 +131,147 @@ async def async_setup(hass: HomeAssistant, config: ConfigEntry):
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Establish connection with MELClooud."""
     conf = entry.data
-    mel_devices = await mel_devices_setup(hass, conf[CONF_TOKEN])
-    hass.data.setdefault(DOMAIN, {}).update({entry.entry_id: mel_devices})
-    hass.config_entries.async_setup_platforms(entry, PLATFORMS)
+    cache = InventoryCache(hass, entry.entry_id)
+    inventory = await cache.async_load()
+    # The config flow has just listed the devices of a new entry.
+    discovery = hass.data.get(DATA_DISCOVERY, {}).pop(entry.unique_id, None)
+    auth = AuthManager(hass, entry)
+    account, mel_devices = await mel_devices_setup(
+        hass,
+        conf[CONF_TOKEN],
+        inventory,
+        _async_get_limiter(hass, entry),
+        auth,
+        discovery,
+    )
+
+    async def async_discover(
+        known: list[MelCloudDevice],
+    ) -> dict[str, list[MelCloudDevice]]:
+        """Return devices listed on the account since setup."""
+        if not known:
+            # No device refresh lists an account without devices.
+            await account.async_request("account", account.client.update_confs)
+        return discover_devices(account, known)
+
+    coordinator = MelCloudCoordinator(
+        hass,
+        mel_devices,
+        update_interval=_scan_interval(entry),
+        refresh_mode=entry.options.get(CONF_REFRESH_MODE, DEFAULT_REFRESH_MODE),
+        cache=cache,
+        discover=async_discover,
+        auth=auth,
+        cached=inventory is not None,
+        account=account,
+    )
+    _async_apply_timing(coordinator, entry)
+    hass.data.setdefault(DOMAIN, {}).update({entry.entry_id: coordinator})
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+    # Keep refreshing without entities, so that devices added later are found.
+    entry.async_on_unload(coordinator.async_add_listener(lambda: None))
+    coordinator.platforms = _platforms(coordinator.devices)
+    hass.config_entries.async_setup_platforms(entry, coordinator.platforms)
+
+    @callback
+    def async_add_platforms(devices: list[MelCloudDevice]):
+        """Load the platforms of device types listed since setup."""
+        platforms = _platforms(coordinator.devices) - coordinator.platforms
+        if platforms:
+            coordinator.platforms |= platforms
+            hass.config_entries.async_setup_platforms(entry, platforms)
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, f"{SIGNAL_DEVICES_ADDED}_{entry.entry_id}", async_add_platforms
+        )
+    )
+    if inventory is None:
+        cache.async_schedule_save(coordinator.all_devices)
+    offline = [
+        device.name for device in coordinator.all_devices if device.reported_offline
+    ]
+    if offline:
+        _LOGGER.warning(
+            "MELCloud reports %s offline, adding them as unavailable",
+            ", ".join(offline),
+        )
+    # Entities start from the listed or cached state and catch up in the
+    # background, spread over the refresh interval.
+    coordinator.stagger()
+    hass.async_create_task(coordinator.async_refresh())
     return True
 
 
+def _platforms(devices: dict[str, list[MelCloudDevice]]) -> set[str]:
+    """Return the platforms with entities for the devices."""
+    return {
+        platform
+        for device_type, platforms in DEVICE_PLATFORMS.items()
+        if devices.get(device_type)
+        for platform in platforms
+    }
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry):
+    """Apply changed options to the running coordinator."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    coordinator.refresh_mode = entry.options.get(
+        CONF_REFRESH_MODE, DEFAULT_REFRESH_MODE
+    )
+    _async_get_limiter(hass, entry)
+    _async_apply_timing(coordinator, entry)
+    # A reauth flow stores the renewed token in the entry.
+    coordinator.auth.async_update_token(entry.data[CONF_TOKEN])
+
+
+def _scan_interval(entry: ConfigEntry) -> timedelta:
+    """Return the refresh interval of a device configured with the options."""
+    return timedelta(
+        seconds=entry.options.get(
+            CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL.total_seconds()
+        )
+    )
+
+
+@callback
+def _async_apply_timing(coordinator: MelCloudCoordinator, entry: ConfigEntry):
+    """Apply the refresh and write timing options to the running devices."""
+    coordinator.interval = _scan_interval(entry)
+    conf_update_interval = timedelta(
+        minutes=entry.options.get(
+            CONF_CONF_UPDATE_INTERVAL,
+            DEFAULT_CONF_UPDATE_INTERVAL.total_seconds() / 60,
+        )
+    )
+    write_debounce = timedelta(
+        seconds=entry.options.get(
+            CONF_WRITE_DEBOUNCE, DEFAULT_WRITE_DEBOUNCE.total_seconds()
+        )
+    )
+    coordinator.account.conf_update_interval = conf_update_interval
+    coordinator.account.write_debounce = write_debounce
+
+
+@callback
+def _async_get_limiter(hass: HomeAssistant, entry: ConfigEntry) -> RequestLimiter:
+    """Return the rate limiter of the login configured with the entry options."""
+    rate = entry.options.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT) / 60
+    burst = entry.options.get(CONF_BURST, DEFAULT_BURST)
+    limiters = hass.data.setdefault(DATA_LIMITERS, {})
+    limiter = limiters.get(entry.data[CONF_USERNAME])
+    if limiter is None:
+        limiter = limiters[entry.data[CONF_USERNAME]] = RequestLimiter(rate, burst)
+    else:
+        limiter.configure(rate, burst)
+    return limiter
+
+
 async def async_unload_entry(hass, config_entry):
     """Unload a config entry."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
     unload_ok = await hass.config_entries.async_unload_platforms(
-        config_entry, PLATFORMS
+        config_entry, coordinator.platforms
     )
     hass.data[DOMAIN].pop(config_entry.entry_id)
     if not hass.data[DOMAIN]:
@@ -81,38 +279,418 @@ async def async_unload_entry(hass, config_entry):
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove the cached inventory of a removed config entry."""
+    await InventoryCache(hass, entry.entry_id).async_remove()
+
+
 class MelCloudDevice:
     """MELCloud Device instance."""
 
-    def __init__(self, device: Device) -> None:
+    def __init__(self, device: Device, account: MelCloudAccount) -> None:
         """Construct a device wrapper."""
         self.device = device
+        self.account = account
         self.name = device.name
+        self.breaker = CircuitBreaker(
+            base_delay=DEVICE_BACKOFF_BASE,
+            threshold=DEVICE_CIRCUIT_THRESHOLD,
+            probe_interval=DEVICE_CIRCUIT_PROBE_INTERVAL,
+            max_delay=MAX_BACKOFF,
+        )
+        self.metrics = RequestMetrics()
         self._available = True
+        self._unreachable_since: datetime | None = None
+        self._refresh = SingleFlight(self._async_fetch)
+        self._write_listeners: list[Callable[[MelCloudDevice], None]] = []
+        self._write_lock = asyncio.Lock()
+        self._pending_writes: dict[str, Any] = {}
+        self._pending_write: asyncio.Future[bool] | None = None
+        self._queued_writes: dict[str, Any] = {}
+        self._last_requested: datetime | None = None
+        self._overlay: dict[str, Any] = {}
+        self._overlay_replaced: dict[str, Any] = {}
+        self._overlay_expires: datetime | None = None
+        self.fingerprint: tuple = ()
+        self.zone_fingerprints: dict[int, tuple] = {}
+        self.snapshot: DeviceSnapshot | None = None
+        self._update_snapshot()
 
-    @Throttle(MIN_TIME_BETWEEN_UPDATES)
-    async def async_update(self, **kwargs):
-        """Pull the latest data from MELCloud."""
-        try:
-            await self.device.update()
-            self._available = True
-        except ClientConnectionError:
-            _LOGGER.warning("Connection failed for %s", self.name)
-            self._available = False
-
-    async def async_set(self, properties: dict[str, Any]):
-        """Write state changes to the MELCloud API."""
-        try:
-            await self.device.set(properties)
-            self._available = True
-        except ClientConnectionError:
-            _LOGGER.warning("Connection failed for %s", self.name)
-            self._available = False
+    async def async_update(self):
+        """Pull the latest data from MELCloud.
+
+        Refresh scheduling is owned by MelCloudCoordinator. Concurrent callers
+        share the request already in flight and return once it has completed.
+        """
+        await self._refresh()
+
+    async def _async_fetch(self):
+        """Fetch device state."""
+        if not await self.account.async_request(
+            self.name,
+            lambda: async_fetch_device_state(self.device),
+            self.breaker,
+            self.metrics,
+        ):
+            self.refresh_failed()
+            return
+        self._set_reachable()
+        self._reconcile_overlay()
+        self._update_snapshot()
+        self._replay_queued_writes()
+
+    async def async_update_units(self):
+        """Fetch unit model information if it has not been fetched yet."""
+        if self.device.units is not None:
+            return
+
+        async def fetch_units():
+            units = await self.client.fetch_device_units(self.device)
+            # Devices without unit information are not asked again.
+            self.device._device_units = units or []  # pylint: disable=protected-access
+
+        if await self.account.async_request(
+            self.name, fetch_units, self.breaker, self.metrics
+        ):
+            self._update_snapshot()
+
+    def apply_conf(self, conf: dict[str, Any]):
+        """Apply device conf and state from an account wide device listing."""
+        # pylint: disable=protected-access
+        self.device._device_conf = conf
+        self.device._state = state_from_conf(conf)
+        self.metrics.last_refresh = dt_util.utcnow()
+        self._set_reachable()
+        self._reconcile_overlay()
+        self._update_snapshot()
+        self._replay_queued_writes()
+
+    def refresh_failed(self, *, transient: bool = True):
+        """Keep the last known state for a while after a failed refresh.
+
+        Entities stay available during short outages, so that changes made
+        meanwhile are queued. The device turns unavailable once it has been
+        unreachable for UNREACHABLE_GRACE, or right away when the refresh
+        failed with an unexpected error. Changes queued before are still sent
+        once the device is reachable again, up to QUEUED_WRITE_TIMEOUT.
+        """
+        now = dt_util.utcnow()
+        if self._unreachable_since is None:
+            self._unreachable_since = now
+        self._available = (
+            transient and now < self._unreachable_since + UNREACHABLE_GRACE
+        )
+
+    def _set_reachable(self):
+        """Mark the device available after a successful request."""
+        self._unreachable_since = None
+        self._available = True
+
+    async def async_set(self, properties: dict[str, Any]) -> bool:
+        """Write state changes to the MELCloud API.
+
+        Changes arriving within the write debounce window are merged and sent
+        with a single request. Every caller waits for the shared write and gets
+        its result. Invalid properties are rejected before they are queued.
+
+        The changes are applied optimistically to the local state right away.
+
+        Changes that could not be sent because MELCloud was unreachable are
+        queued and sent along with the next write or once the device has been
+        refreshed successfully. Queued changes to the same property are
+        merged, so only the latest value is sent.
+        """
+        overlay: dict[str, Any] = {}
+        for key, value in properties.items():
+            if key == PROPERTY_POWER:
+                overlay["Power"] = value
+            else:
+                self.device.apply_write(overlay, key, value)
+        overlay.pop(EFFECTIVE_FLAGS, None)
+
+        self._overlay.update(overlay)
+        self._overlay_expires = dt_util.utcnow() + OPTIMISTIC_STATE_TIMEOUT
+        self._apply_overlay()
+        self._update_snapshot()
+        self._notify_write_listeners()
+
+        self._pending_writes.update(properties)
+        self._last_requested = dt_util.utcnow()
+        return await asyncio.shield(self._schedule_write())
+
+    def _schedule_write(self) -> asyncio.Future[bool]:
+        """Return the shared write, starting it if none is waiting."""
+        if self._pending_write is None:
+            self._pending_write = asyncio.get_running_loop().create_future()
+            asyncio.ensure_future(self._async_write_pending())
+        return self._pending_write
+
+    def _replay_queued_writes(self):
+        """Send the changes queued while MELCloud was unreachable."""
+        if not self._queued_writes:
+            return
+        if dt_util.utcnow() >= self._last_requested + QUEUED_WRITE_TIMEOUT:
+            _LOGGER.warning(
+                "Dropping %s queued for %s, MELCloud was unreachable for too long",
+                self._queued_writes,
+                self.name,
+            )
+            self._queued_writes = {}
+            return
+        # Nobody waits for the replay, errors have been logged already.
+        self._schedule_write().add_done_callback(lambda write: write.exception())
+
+    async def _async_write_pending(self):
+        """Send the changes queued during the debounce window."""
+        await asyncio.sleep(self.account.write_debounce.total_seconds())
+
+        async with self._write_lock:
+            # Changes arriving while an earlier write holds the lock join this
+            # one, and the outcome of the earlier write is known.
+            properties = {**self._queued_writes, **self._pending_writes}
+            self._queued_writes, self._pending_writes = {}, {}
+            result, self._pending_write = self._pending_write, None
+            try:
+                sent = await self.account.async_request(
+                    self.name,
+                    lambda: self._async_send(properties),
+                    self.breaker,
+                    self.metrics,
+                    KIND_WRITE,
+                )
+            except Exception as err:  # pylint: disable=broad-except
+                self._discard_overlay()
+                result.set_exception(err)
+                return
+
+        result.set_result(sent)
+        if not sent:
+            # Availability is left to refreshes, so that entities keep taking
+            # changes to queue while MELCloud is unreachable.
+            _LOGGER.warning(
+                "Failed to write %s to %s, sending once reachable again",
+                properties,
+                self.name,
+            )
+            # Changes queued meanwhile are newer than the ones that failed.
+            self._queued_writes = {**properties, **self._queued_writes}
+            self._discard_overlay()
+            return
+        for key in properties:
+            self._queued_writes.pop(key, None)
+        self._set_reachable()
+        self._reconcile_overlay()
+        self._update_snapshot()
+        self._notify_write_listeners()
+
+    def _apply_overlay(self):
+        """Apply optimistic state on top of the latest MELCloud state."""
+        state = self.device._state  # pylint: disable=protected-access
+        if state is None:
+            return
+        for key, value in self._overlay.items():
+            self._overlay_replaced.setdefault(key, state.get(key))
+            state[key] = value
+
+    def _reconcile_overlay(self):
+        """Check optimistic state against freshly fetched state.
+
+        Values confirmed by MELCloud leave the overlay. Values MELCloud still
+        disagrees with are kept on top of the fetched state until the overlay
+        expires.
+        """
+        if not self._overlay:
+            return
+        state = self.device._state  # pylint: disable=protected-access
+        if state is None:
+            return
+        self._overlay_replaced = {}
+        self._overlay = {
+            key: value
+            for key, value in self._overlay.items()
+            if state.get(key) != value
+        }
+        if not self._overlay:
+            return
+        if dt_util.utcnow() >= self._overlay_expires:
+            _LOGGER.debug(
+                "MELCloud did not confirm %s for %s, dropping optimistic state",
+                self._overlay,
+                self.name,
+            )
+            self._overlay = {}
+            return
+        self._apply_overlay()
+
+    def _discard_overlay(self):
+        """Drop optimistic state after a failed write."""
+        state = self.device._state  # pylint: disable=protected-access
+        if state is not None:
+            state.update(self._overlay_replaced)
+        self._overlay = {}
+        self._overlay_replaced = {}
+        self._update_snapshot()
+        self._notify_write_listeners()
+
+    def _update_snapshot(self):
+        """Fingerprint the device state and take a new snapshot if it changed.
+
+        Entities compare the fingerprints to skip writing unchanged state. A
+        zone fingerprint leaves out the values of the other zones.
+        """
+        # pylint: disable=protected-access
+        conf = self.device._device_conf.get("Device", {})
+        state = self.device._state or {}
+        fingerprint = (
+            _fingerprint(conf),
+            _fingerprint(state),
+            self.device.units is not None,
+        )
+        if fingerprint == self.fingerprint:
+            return
+        self.fingerprint = fingerprint
+        self.snapshot = take_snapshot(self.device, self._build_device_info())
+        self.zone_fingerprints = {}
+        if not isinstance(self.device, AtwDevice):
+            return
+        for zone_index in ZONE_INDEXES:
+            skip = tuple(
+                f"Zone{index}" for index in ZONE_INDEXES if index != zone_index
+            )
+            self.zone_fingerprints[zone_index] = (
+                _fingerprint(conf, skip),
+                _fingerprint(state, skip),
+            )
+
+    def _notify_write_listeners(self):
+        """Tell listeners the device was written to."""
+        for listener in list(self._write_listeners):
+            listener(self)
+
+    async def _async_send(self, properties: dict[str, Any]):
+        """Send merged properties with a single request.
+
+        Device.set is not used as it runs its own debounce task and never
+        returns if that write fails.
+        """
+        # pylint: disable=protected-access
+        state = self.device._state
+        if state is None:
+            state = state_from_conf(self.device._device_conf)
+        new_state = state.copy()
+        for key, value in properties.items():
+            if key == PROPERTY_POWER:
+                new_state["Power"] = value
+                new_state[EFFECTIVE_FLAGS] = new_state.get(EFFECTIVE_FLAGS, 0) | 0x01
+            else:
+                self.device.apply_write(new_state, key, value)
+        if new_state.get(EFFECTIVE_FLAGS):
+            new_state[HAS_PENDING_COMMAND] = True
+        self.device._state = await self.client.set_device_state(new_state)
+
+    @callback
+    def async_add_write_listener(
+        self, listener: Callable[[MelCloudDevice], None]
+    ) -> Callable[[], None]:
+        """Listen for writes to the device."""
+        self._write_listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            self._write_listeners.remove(listener)
+
+        return remove_listener
+
+    @property
+    def last_communication(self) -> datetime | None:
+        """Return the time the unit last reported to MELCloud."""
+        return self._state_time("LastCommunication")
+
+    @property
+    def next_communication(self) -> datetime | None:
+        """Return the time the unit is expected to report to MELCloud next."""
+        return self._state_time("NextCommunication")
+
+    def _state_time(self, key: str) -> datetime | None:
+        """Parse a UTC timestamp from the device state."""
+        state = self.device._state  # pylint: disable=protected-access
+        if state is None or not state.get(key):
+            return None
+        parsed = dt_util.parse_datetime(state[key])
+        if parsed is None:
+            return None
+        return parsed.replace(tzinfo=dt_util.UTC)
+
+    @property
+    def state_signature(self) -> tuple | None:
+        """Return a comparable view of the device state.
+
+        Timestamps of the communication between the unit and MELCloud change on
+        every report and are left out.
+        """
+        state = self.device._state  # pylint: disable=protected-access
+        if state is None:
+            return None
+        return tuple(
+            sorted(
+                (key, value)
+                for key, value in state.items()
+                if key not in _VOLATILE_STATE_KEYS
+            )
+        )
+
+    @property
+    def queued_writes(self) -> dict[str, Any]:
+        """Return the changes waiting for MELCloud to be reachable."""
+        return dict(self._queued_writes)
+
+    @property
+    def confirmed_state(self) -> dict[str, Any] | None:
+        """Return the device state without optimistic writes."""
+        state = self.device._state  # pylint: disable=protected-access
+        if state is None:
+            return None
+        return {**state, **self._overlay_replaced}
 
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
-        return self._available
+        return self._available and not self.reported_offline
+
+    @property
+    def unreachable_since(self) -> datetime | None:
+        """Return when requests for the device started failing, if they are."""
+        return self._unreachable_since
+
+    @property
+    def reported_offline(self) -> bool:
+        """Return True if MELCloud has lost the connection to the unit."""
+        # pylint: disable=protected-access
+        return bool((self.device._state or {}).get("Offline"))
+
+    @property
+    def client(self) -> Client:
+        """Return the MELCloud client shared by the devices of the account."""
+        return self.account.client
+
+    @property
+    def circuit_state(self) -> str:
+        """Return the breaker state, account wide outages taking precedence."""
+        if self.account.circuit_state != STATE_CLOSED:
+            return self.account.circuit_state
+        return self.breaker.state
+
+    @property
+    def retry_at(self) -> datetime | None:
+        """Return the time before which requests are backing off."""
+        return max(
+            (
+                retry_at
+                for retry_at in (self.breaker.retry_at, self.account.breaker.retry_at)
+                if retry_at is not None
+            ),
+            default=None,
+        )
 
     @property
     def device_id(self):
@@ -127,6 +705,10 @@ class MelCloudDevice:
     @property
     def device_info(self):
         """Return a device description for device registry."""
+        return self.snapshot.device_info
+
+    def _build_device_info(self) -> dict[str, Any]:
+        """Describe the device for the device registry."""
         _device_info = {
             "connections": {(CONNECTION_NETWORK_MAC, self.device.mac)},
             "identifiers": {(DOMAIN, f"{self.device.mac}-{self.device.serial}")},
@@ -134,28 +716,97 @@ class MelCloudDevice:
             "name": self.name,
         }
         unit_infos = self.device.units
-        if unit_infos is not None:
+        if unit_infos:
             _device_info["model"] = ", ".join(
                 [x["model"] for x in unit_infos if x["model"]]
             )
         return _device_info
 
 
-async def mel_devices_setup(hass, token) -> list[MelCloudDevice]:
-    """Query connected devices from MELCloud."""
+async def mel_devices_setup(
+    hass,
+    token,
+    inventory: dict[str, Any] | None = None,
+    limiter: RequestLimiter | None = None,
+    auth: AuthManager | None = None,
+    discovery: dict[str, Any] | None = None,
+) -> tuple[MelCloudAccount, dict[str, list[MelCloudDevice]]]:
+    """Query connected devices from MELCloud and return them with the account.
+
+    The device listing carries the state of every device, so the devices
+    start from it without fetching each device. A cached inventory or the
+    listing fetched by the config flow is used as is without contacting
+    MELCloud.
+    """
     session = hass.helpers.aiohttp_client.async_get_clientsession()
-    try:
-        with timeout(10):
-            all_devices = await get_devices(
-                token,
-                session,
-                conf_update_interval=timedelta(minutes=5),
-                device_set_debounce=timedelta(seconds=1),
-            )
-    except (asyncio.TimeoutError, ClientConnectionError) as ex:
-        raise ConfigEntryNotReady() from ex
+    client = Client(
+        token,
+        session,
+        conf_update_interval=DEFAULT_CONF_UPDATE_INTERVAL,
+        device_set_debounce=timedelta(0),
+    )
+    if inventory is not None:
+        restore_client(client, inventory)
+    elif discovery is not None:
+        restore_discovery(client, discovery)
+    else:
+        try:
+            async with timeout(REQUEST_TIMEOUT):
+                await client.update_confs()
+        except ClientResponseError as ex:
+            if is_auth_error(ex):
+                raise ConfigEntryAuthFailed() from ex
+            if not is_overload_error(ex):
+                raise
+            raise ConfigEntryNotReady() from ex
+        except (asyncio.TimeoutError, ClientConnectionError) as ex:
+            raise ConfigEntryNotReady() from ex
 
+    account = MelCloudAccount(client, limiter, auth)
+    if inventory is None:
+        return account, _wrap_devices(account, client.device_confs)
+
+    # Writes are debounced and sent by MelCloudDevice.
+    all_devices = devices_from_confs(client, set_debounce=timedelta(0))
+    wrapped_devices = {}
+    for device_type, devices in all_devices.items():
+        for device in devices:
+            restore_device(device, inventory)
+        wrapped_devices[device_type] = [
+            MelCloudDevice(device, account) for device in devices
+        ]
+    return account, wrapped_devices
+
+
+def discover_devices(
+    account: MelCloudAccount, known: list[MelCloudDevice]
+) -> dict[str, list[MelCloudDevice]]:
+    """Return devices listed on the account since the known devices were set up.
+
+    Devices missing from the listing during setup are picked up once they are
+    listed again.
+    """
+    keys = {(device.device_id, device.building_id) for device in known}
+    confs = [conf for conf in account.client.device_confs if conf_key(conf) not in keys]
+    if not confs:
+        return {}
+    return _wrap_devices(account, confs)
+
+
+def _wrap_devices(
+    account: MelCloudAccount, confs: list[dict[str, Any]]
+) -> dict[str, list[MelCloudDevice]]:
+    """Create devices starting from the state in their listing entries."""
+    # Writes are debounced and sent by MelCloudDevice.
+    all_devices = devices_from_confs(
+        account.client, set_debounce=timedelta(0), confs=confs
+    )
     wrapped_devices = {}
     for device_type, devices in all_devices.items():
-        wrapped_devices[device_type] = [MelCloudDevice(device) for device in devices]
+        wrapped_devices[device_type] = []
+        for device in devices:
+            mel_device = MelCloudDevice(device, account)
+            # pylint: disable=protected-access
+            mel_device.apply_conf(device._device_conf)
+            wrapped_devices[device_type].append(mel_device)
     return wrapped_devices
@@ -0,0 +1,328 @@
+"""Account wide MELCloud requests."""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from http import HTTPStatus
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from aiohttp import ClientConnectionError, ClientResponseError
+from async_timeout import timeout
+from pymelcloud import DEVICE_TYPE_ATA, DEVICE_TYPE_ATW, AtaDevice, AtwDevice, Device
+from pymelcloud.client import Client
+
+from homeassistant.core import callback
+import homeassistant.util.dt as dt_util
+
+from .auth import AuthManager, is_auth_error
+from .backoff import STATE_OPEN, CircuitBreaker
+from .const import (
+    ACCOUNT_BACKOFF_BASE,
+    ACCOUNT_CIRCUIT_PROBE_INTERVAL,
+    ACCOUNT_CIRCUIT_THRESHOLD,
+    DEFAULT_BURST,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_WRITE_DEBOUNCE,
+    MAX_BACKOFF,
+    REQUEST_TIMEOUT,
+)
+from .limiter import PRIORITY_REFRESH, PRIORITY_WRITE, RequestLimiter
+from .metrics import KIND_REFRESH, KIND_WRITE, RequestMetrics
+
+if TYPE_CHECKING:
+    from . import MelCloudDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+# ListDevices reports a few values under different keys than Device/Get.
+_CONF_STATE_KEYS = {
+    "FanSpeed": "SetFanSpeed",
+    "VaneHorizontalDirection": "VaneHorizontal",
+    "VaneVerticalDirection": "VaneVertical",
+}
+
+
+def state_from_conf(conf: dict[str, Any]) -> dict[str, Any]:
+    """Build a Device/Get compatible state from a ListDevices entry."""
+    state = {
+        _CONF_STATE_KEYS.get(key, key): value
+        for key, value in conf.get("Device", {}).items()
+        if not isinstance(value, (dict, list))
+    }
+    state["DeviceID"] = conf.get("DeviceID")
+    state.setdefault("EffectiveFlags", 0)
+    return state
+
+
+class DeviceNotListedError(Exception):
+    """The account listing does not include the device."""
+
+
+def conf_key(conf: dict[str, Any]) -> tuple[int, int]:
+    """Return the device and building ID of a listing entry."""
+    return conf.get("DeviceID"), conf.get("BuildingID")
+
+
+def discovery_from_client(client: Client) -> dict[str, Any]:
+    """Return the listing fetched by a client for a later setup to reuse."""
+    # pylint: disable=protected-access
+    return {
+        "account": client.account,
+        "confs": client.device_confs,
+        "fetched_at": client._last_conf_update,
+    }
+
+
+def restore_discovery(client: Client, discovery: dict[str, Any]):
+    """Populate the client with a listing fetched by the config flow."""
+    # pylint: disable=protected-access
+    client._account = discovery["account"]
+    client._device_confs = discovery["confs"]
+    client._last_conf_update = discovery["fetched_at"]
+
+
+def devices_from_confs(
+    client: Client,
+    *,
+    set_debounce: timedelta,
+    confs: list[dict[str, Any]] | None = None,
+) -> dict[str, list[Device]]:
+    """Create devices for the given confs, by default all known by the client."""
+    if confs is None:
+        confs = client.device_confs
+    return {
+        DEVICE_TYPE_ATA: [
+            AtaDevice(conf, client, set_debounce=set_debounce)
+            for conf in confs
+            if conf.get("Device", {}).get("DeviceType") == 0
+        ],
+        DEVICE_TYPE_ATW: [
+            AtwDevice(conf, client, set_debounce=set_debounce)
+            for conf in confs
+            if conf.get("Device", {}).get("DeviceType") == 1
+        ],
+    }
+
+
+def is_overload_error(err: Exception) -> bool:
+    """Return True if MELCloud asks to slow down."""
+    return isinstance(err, ClientResponseError) and (
+        err.status == HTTPStatus.TOO_MANY_REQUESTS or err.status >= 500
+    )
+
+
+def is_transient_error(err: Exception) -> bool:
+    """Return True for errors worth retrying later."""
+    if isinstance(err, ClientResponseError):
+        return is_overload_error(err)
+    return isinstance(
+        err, (ClientConnectionError, asyncio.TimeoutError, DeviceNotListedError)
+    )
+
+
+class MelCloudAccount:
+    """Client and connection health shared by the devices of an account."""
+
+    def __init__(
+        self,
+        client: Client,
+        limiter: RequestLimiter | None = None,
+        auth: AuthManager | None = None,
+    ) -> None:
+        """Initialize the account."""
+        self.client = client
+        self.auth = auth
+        if auth is not None:
+            auth.async_add_listener(self._async_token_renewed)
+        if limiter is None:
+            limiter = RequestLimiter(DEFAULT_RATE_LIMIT / 60, DEFAULT_BURST)
+        self.limiter = limiter
+        self.breaker = CircuitBreaker(
+            base_delay=ACCOUNT_BACKOFF_BASE,
+            threshold=ACCOUNT_CIRCUIT_THRESHOLD,
+            probe_interval=ACCOUNT_CIRCUIT_PROBE_INTERVAL,
+            max_delay=MAX_BACKOFF,
+        )
+        self.metrics = RequestMetrics()
+        self.write_debounce = DEFAULT_WRITE_DEBOUNCE
+
+    @property
+    def conf_update_interval(self) -> timedelta:
+        """Return the minimum time between device listings."""
+        return self.client._conf_update_interval  # pylint: disable=protected-access
+
+    @conf_update_interval.setter
+    def conf_update_interval(self, interval: timedelta):
+        """Change the minimum time between device listings."""
+        self.client._conf_update_interval = interval  # pylint: disable=protected-access
+
+    async def async_request(
+        self,
+        name: str,
+        request: Callable[[], Awaitable[Any]],
+        breaker: CircuitBreaker | None = None,
+        metrics: RequestMetrics | None = None,
+        kind: str = KIND_REFRESH,
+    ) -> bool:
+        """Send a request unless backing off. Return True on success.
+
+        Connection errors, timeouts, 429 and 5xx responses are recorded as
+        failures on the given breaker and the account breaker. Other errors are
+        raised. Latency and outcome are recorded in the given metrics,
+        defaulting to the account metrics.
+
+        Requests wait for the account rate limiter, writes ahead of refreshes.
+
+        A rejected access token starts a reauth flow and requests are skipped
+        until the token has been renewed.
+        """
+        if self.auth is not None and self.auth.failed:
+            _LOGGER.debug("Waiting for a new access token, skipping %s", name)
+            return False
+        breakers = [self.breaker] if breaker is None else [breaker, self.breaker]
+        now = dt_util.utcnow()
+        # Probes of open circuits are only taken once every breaker agrees.
+        if not all(item.ready(now) for item in breakers):
+            _LOGGER.debug("Backing off, skipping request for %s", name)
+            return False
+        for item in breakers:
+            item.allow(now)
+
+        await self.limiter.acquire(
+            PRIORITY_WRITE if kind == KIND_WRITE else PRIORITY_REFRESH
+        )
+
+        metrics = self.metrics if metrics is None else metrics
+        start = time.monotonic()
+        try:
+            async with timeout(REQUEST_TIMEOUT):
+                await request()
+        except Exception as err:  # pylint: disable=broad-except
+            metrics.record_failure(kind, time.monotonic() - start, err)
+            if self.auth is not None and is_auth_error(err):
+                self.auth.async_auth_failed(err)
+                return False
+            if is_overload_error(err):
+                self.limiter.slow_down()
+            if not is_transient_error(err):
+                raise
+            self._record_failure(name, breakers, err)
+            return False
+
+        metrics.record_success(kind, time.monotonic() - start, dt_util.utcnow())
+        self.limiter.speed_up()
+        if breakers[0].failures:
+            _LOGGER.info("Connection restored for %s", name)
+        for item in breakers:
+            item.record_success()
+        return True
+
+    def _record_failure(
+        self, name: str, breakers: list[CircuitBreaker], err: Exception
+    ):
+        """Record a failed request and log state changes only."""
+        now = dt_util.utcnow()
+        for item in breakers:
+            was_open = item.state == STATE_OPEN
+            item.record_failure(now)
+            if item.state == STATE_OPEN and not was_open:
+                _LOGGER.warning(
+                    "Requests for %s keep failing, probing again at %s",
+                    "the MELCloud account" if item is self.breaker else name,
+                    item.retry_at,
+                )
+        if breakers[0].failures == 1:
+            _LOGGER.warning("Connection failed for %s: %r", name, err)
+        else:
+            _LOGGER.debug("Connection failed for %s: %r", name, err)
+
+    @callback
+    def _async_token_renewed(self, token: str):
+        """Send the following requests with the renewed token."""
+        self.client._token = token  # pylint: disable=protected-access
+
+    @property
+    def circuit_state(self) -> str:
+        """Return the state of the account breaker."""
+        return self.breaker.state
+
+
+async def async_fetch_device_confs(client: Client) -> list[dict[str, Any]]:
+    """Fetch the conf and state of every device on the account.
+
+    A single ListDevices request covers all buildings, floors and areas.
+    """
+    await client._fetch_device_confs()  # pylint: disable=protected-access
+    return client.device_confs
+
+
+async def async_fetch_device_state(device: Device):
+    """Fetch the state of a device still listed on the account.
+
+    Device.update looks the device up in the listing, which it refreshes
+    every few minutes, and fails obscurely for a device that has dropped out.
+    """
+    client = device._client  # pylint: disable=protected-access
+    await client.update_confs()
+    key = (device.device_id, device.building_id)
+    if not any(conf_key(conf) == key for conf in client.device_confs):
+        raise DeviceNotListedError(f"{device.name} is not listed on the account")
+    await device.update()
+    if device.units is None:
+        # Device.update asks for missing unit information on every refresh.
+        device._device_units = []  # pylint: disable=protected-access
+
+
+async def async_refresh_devices(devices: list[MelCloudDevice]) -> None:
+    """Refresh devices using one Device/Get request per device.
+
+    A device failing with an unexpected error is marked unavailable without
+    failing the refresh of the other devices.
+    """
+    results = await asyncio.gather(
+        *[device.async_update() for device in devices], return_exceptions=True
+    )
+    for device, result in zip(devices, results):
+        if isinstance(result, Exception):
+            _LOGGER.error("Failed to refresh %s: %r", device.name, result)
+            device.refresh_failed(transient=False)
+
+
+async def async_refresh_account(
+    account: MelCloudAccount, devices: list[MelCloudDevice]
+):
+    """Refresh devices using a single ListDevices request."""
+    try:
+        listed = await account.async_request(
+            "account", lambda: async_fetch_device_confs(account.client)
+        )
+    except Exception as err:  # pylint: disable=broad-except
+        _LOGGER.error("Failed to refresh the MELCloud account: %r", err)
+        for device in devices:
+            device.refresh_failed(transient=False)
+        return
+    if not listed:
+        for device in devices:
+            device.refresh_failed()
+        return
+
+    confs = {conf_key(conf): conf for conf in account.client.device_confs}
+
+    for device in devices:
+        conf = confs.get((device.device_id, device.building_id))
+        if conf is None:
+            device.refresh_failed()
+            continue
+        device.apply_conf(conf)
+
+    # Unit model names are not part of the listing. They are static, so each
+    # device fetches them once.
+    await asyncio.gather(
+        *[
+            device.async_update_units()
+            for device in devices
+            if device.unreachable_since is None
+        ]
+    )
@@ -0,0 +1,79 @@
+"""Access token renewal for MELCloud accounts."""
+from __future__ import annotations
+
+from http import HTTPStatus
+import logging
+from typing import Callable
+
+from aiohttp import ClientResponseError
+
+from homeassistant.config_entries import SOURCE_REAUTH, ConfigEntry
+from homeassistant.const import CONF_TOKEN
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def is_auth_error(err: Exception) -> bool:
+    """Return True if MELCloud rejected the access token."""
+    return isinstance(err, ClientResponseError) and err.status in (
+        HTTPStatus.UNAUTHORIZED,
+        HTTPStatus.FORBIDDEN,
+    )
+
+
+class AuthManager:
+    """Access token of a config entry.
+
+    Once MELCloud rejects the token, requests are held back and a reauth flow
+    asks for the password. The renewed token is handed to the listeners in
+    place, so the entry does not have to be reloaded.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize the manager with the token of the entry."""
+        self.hass = hass
+        self.entry = entry
+        self.token: str = entry.data[CONF_TOKEN]
+        self.failed = False
+        self._listeners: list[Callable[[str], None]] = []
+
+    @callback
+    def async_add_listener(self, listener: Callable[[str], None]) -> Callable[[], None]:
+        """Call the listener with each renewed token."""
+        self._listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(listener)
+
+        return remove_listener
+
+    @callback
+    def async_auth_failed(self, err: Exception):
+        """Hold back requests and ask for the password."""
+        if self.failed:
+            return
+        self.failed = True
+        _LOGGER.warning(
+            "MELCloud rejected the access token of %s: %s", self.entry.title, err
+        )
+        self.hass.async_create_task(
+            self.hass.config_entries.flow.async_init(
+                DOMAIN,
+                context={"source": SOURCE_REAUTH, "entry_id": self.entry.entry_id},
+                data=dict(self.entry.data),
+            )
+        )
+
+    @callback
+    def async_update_token(self, token: str):
+        """Start using a renewed token."""
+        if token == self.token and not self.failed:
+            return
+        self.token = token
+        self.failed = False
+        for listener in list(self._listeners):
+            listener(token)
@@ -0,0 +1,70 @@
+"""Backoff and circuit breaking for MELCloud requests."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import random
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Exponential backoff with jitter and a circuit breaker.
+
+    Each failure delays the next request exponentially from base_delay. After
+    threshold consecutive failures the circuit opens and only a single probe
+    request is let through per probe interval. The probe interval keeps
+    doubling up to max_delay while the probes fail. A success closes the
+    circuit again.
+    """
+
+    def __init__(
+        self,
+        *,
+        base_delay: timedelta,
+        threshold: int,
+        probe_interval: timedelta,
+        max_delay: timedelta,
+    ) -> None:
+        """Initialize the breaker."""
+        self.base_delay = base_delay
+        self.threshold = threshold
+        self.probe_interval = probe_interval
+        self.max_delay = max_delay
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.retry_at: datetime | None = None
+
+    def ready(self, now: datetime) -> bool:
+        """Return True if a request may be sent now, without taking the probe."""
+        return self.retry_at is None or now >= self.retry_at
+
+    def allow(self, now: datetime) -> bool:
+        """Return True if a request may be sent now.
+
+        Letting a request through an open circuit turns it into the probe.
+        """
+        if not self.ready(now):
+            return False
+        if self.state == STATE_OPEN:
+            self.state = STATE_HALF_OPEN
+            self.retry_at = now + self.probe_interval
+        return True
+
+    def record_success(self):
+        """Close the circuit."""
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.retry_at = None
+
+    def record_failure(self, now: datetime):
+        """Back off after a failed request."""
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN or self.failures >= self.threshold:
+            self.state = STATE_OPEN
+            delay = self.probe_interval * 2 ** max(self.failures - self.threshold, 0)
+        else:
+            delay = self.base_delay * 2 ** (self.failures - 1)
+        delay = min(delay, self.max_delay) * random.uniform(0.5, 1.5)
+        self.retry_at = now + delay if delay else None
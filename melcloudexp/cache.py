@@ -0,0 +1,86 @@
+"""Persistent cache of the MELCloud device inventory."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from pymelcloud import Device
+from pymelcloud.client import Client
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from . import MelCloudDevice
+
+STORAGE_VERSION = 1
+
+# The inventory changes slowly. Pending saves are flushed on shutdown.
+SAVE_DELAY = 60
+
+
+class InventoryCache:
+    """Last known devices and states of a config entry.
+
+    The cache lets the integration create its entities without waiting for
+    MELCloud on startup.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the cache."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+
+    async def async_load(self) -> dict[str, Any] | None:
+        """Return the cached inventory, if any."""
+        inventory = await self._store.async_load()
+        if not inventory or not inventory.get("devices"):
+            return None
+        return inventory
+
+    @callback
+    def async_schedule_save(self, devices: list[MelCloudDevice]):
+        """Save the inventory after a while."""
+        if devices:
+            self._store.async_delay_save(lambda: _inventory(devices), SAVE_DELAY)
+
+    async def async_remove(self):
+        """Remove the cache."""
+        await self._store.async_remove()
+
+
+def _inventory(devices: list[MelCloudDevice]) -> dict[str, Any]:
+    """Serialize the devices of an account."""
+    # pylint: disable=protected-access
+    return {
+        "account": devices[0].client.account,
+        "devices": [
+            {
+                "conf": device.device._device_conf,
+                "state": device.confirmed_state,
+                "units": device.device._device_units,
+            }
+            for device in devices
+        ],
+    }
+
+
+def restore_client(client: Client, inventory: dict[str, Any]):
+    """Populate the client with cached confs instead of fetching them."""
+    # pylint: disable=protected-access
+    client._device_confs = [item["conf"] for item in inventory["devices"]]
+    client._account = inventory["account"]
+
+
+def restore_device(device: Device, inventory: dict[str, Any]):
+    """Restore the cached state and units of a device."""
+    for item in inventory["devices"]:
+        conf = item["conf"]
+        if (conf.get("DeviceID"), conf.get("BuildingID")) == (
+            device.device_id,
+            device.building_id,
+        ):
+            # pylint: disable=protected-access
+            device._state = item["state"]
+            device._device_units = item["units"]
+            return
@@ -1,7 +1,6 @@
 """Platform for climate integration."""
 from __future__ import annotations
 
-from datetime import timedelta
 from typing import Any
 
 from pymelcloud import DEVICE_TYPE_ATA, DEVICE_TYPE_ATW, AtaDevice, AtwDevice
@@ -11,13 +10,8 @@ import voluptuous as vol
 
 from homeassistant.components.climate import ClimateEntity
 from homeassistant.components.climate.const import (
-    DEFAULT_MAX_TEMP,
-    DEFAULT_MIN_TEMP,
     HVAC_MODE_COOL,
-    HVAC_MODE_DRY,
-    HVAC_MODE_FAN_ONLY,
     HVAC_MODE_HEAT,
-    HVAC_MODE_HEAT_COOL,
     HVAC_MODE_OFF,
     SUPPORT_FAN_MODE,
     SUPPORT_SWING_MODE,
@@ -25,8 +19,9 @@ from homeassistant.components.climate.const import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import TEMP_CELSIUS
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from . import MelCloudDevice
 from .const import (
@@ -39,56 +34,77 @@ from .const import (
     DOMAIN,
     SERVICE_SET_VANE_HORIZONTAL,
     SERVICE_SET_VANE_VERTICAL,
+    SIGNAL_DEVICES_ADDED,
 )
-
-SCAN_INTERVAL = timedelta(seconds=60)
-
-
-ATA_HVAC_MODE_LOOKUP = {
-    ata.OPERATION_MODE_HEAT: HVAC_MODE_HEAT,
-    ata.OPERATION_MODE_DRY: HVAC_MODE_DRY,
-    ata.OPERATION_MODE_COOL: HVAC_MODE_COOL,
-    ata.OPERATION_MODE_FAN_ONLY: HVAC_MODE_FAN_ONLY,
-    ata.OPERATION_MODE_HEAT_COOL: HVAC_MODE_HEAT_COOL,
-}
-ATA_HVAC_MODE_REVERSE_LOOKUP = {v: k for k, v in ATA_HVAC_MODE_LOOKUP.items()}
+from .coordinator import MelCloudCoordinator
+from .entity import MelCloudEntity
+from .snapshot import ATA_HVAC_MODE_REVERSE_LOOKUP, AtaSnapshot, ZoneSnapshot
 
 ATW_ZONE_FLOW_MODE_HEAT = "heat"
 ATW_ZONE_FLOW_MODE_COOL = "cool"
 
 
+def _device_entities(
+    coordinator: MelCloudCoordinator, mel_device: MelCloudDevice
+) -> list[MelCloudClimate]:
+    """Create the climate entities of a device."""
+    if mel_device.device.device_type == DEVICE_TYPE_ATA:
+        return [AtaDeviceClimate(coordinator, mel_device, mel_device.device)]
+    if mel_device.device.device_type != DEVICE_TYPE_ATW:
+        return []
+
+    entities: list[MelCloudClimate] = []
+    for zone in mel_device.device.zones:
+        entities.append(
+            AtwDeviceZoneThermostatClimate(
+                coordinator, mel_device, mel_device.device, zone
+            )
+        )
+        if atw.ZONE_OPERATION_MODE_HEAT_FLOW in zone.operation_modes:
+            entities.append(
+                AtwDeviceZoneFlowClimate(
+                    coordinator,
+                    mel_device,
+                    mel_device.device,
+                    zone,
+                    ATW_ZONE_FLOW_MODE_HEAT,
+                )
+            )
+        if atw.ZONE_OPERATION_MODE_COOL_FLOW in zone.operation_modes:
+            entities.append(
+                AtwDeviceZoneFlowClimate(
+                    coordinator,
+                    mel_device,
+                    mel_device.device,
+                    zone,
+                    ATW_ZONE_FLOW_MODE_COOL,
+                )
+            )
+    return entities
+
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities
 ):
     """Set up MelCloud device climate based on config_entry."""
-    mel_devices = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities(
-        [
-            AtaDeviceClimate(mel_device, mel_device.device)
-            for mel_device in mel_devices[DEVICE_TYPE_ATA]
-        ]
-        + [
-            AtwDeviceZoneThermostatClimate(mel_device, mel_device.device, zone)
-            for mel_device in mel_devices[DEVICE_TYPE_ATW]
-            for zone in mel_device.device.zones
-        ]
-        + [
-            AtwDeviceZoneFlowClimate(
-                mel_device, mel_device.device, zone, ATW_ZONE_FLOW_MODE_HEAT
-            )
-            for mel_device in mel_devices[DEVICE_TYPE_ATW]
-            for zone in mel_device.device.zones
-            if atw.ZONE_OPERATION_MODE_HEAT_FLOW in zone.operation_modes
-        ]
-        + [
-            AtwDeviceZoneFlowClimate(
-                mel_device, mel_device.device, zone, ATW_ZONE_FLOW_MODE_COOL
-            )
-            for mel_device in mel_devices[DEVICE_TYPE_ATW]
-            for zone in mel_device.device.zones
-            if atw.ZONE_OPERATION_MODE_COOL_FLOW in zone.operation_modes
-        ],
-        True,
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def async_add_devices(mel_devices: list[MelCloudDevice]):
+        """Add the climate entities of the devices."""
+        async_add_entities(
+            [
+                entity
+                for mel_device in mel_devices
+                for entity in _device_entities(coordinator, mel_device)
+            ]
+        )
+
+    async_add_devices(coordinator.all_devices)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, f"{SIGNAL_DEVICES_ADDED}_{entry.entry_id}", async_add_devices
+        )
     )
 
     platform = entity_platform.async_get_current_platform()
@@ -104,18 +120,26 @@ async def async_setup_entry(
     )
 
 
-class MelCloudClimate(ClimateEntity):
+class MelCloudClimate(MelCloudEntity, ClimateEntity):
     """Base climate device."""
 
-    def __init__(self, device: MelCloudDevice) -> None:
+    def __init__(
+        self, coordinator: MelCloudCoordinator, device: MelCloudDevice
+    ) -> None:
         """Initialize the climate."""
+        super().__init__(coordinator)
         self.api = device
-        self._base_device = self.api.device
         self._name = device.name
 
-    async def async_update(self):
-        """Update state from MELCloud."""
-        await self.api.async_update()
+    @property
+    def available(self) -> bool:
+        """Return True if entity is available."""
+        return super().available and self.api.available
+
+    @property
+    def state_fingerprint(self) -> tuple:
+        """Return the fingerprint of the device state."""
+        return self.api.fingerprint
 
     @property
     def device_info(self):
@@ -125,16 +149,23 @@ class MelCloudClimate(ClimateEntity):
     @property
     def target_temperature_step(self) -> float | None:
         """Return the supported step of target temperature."""
-        return self._base_device.temperature_increment
+        return self.api.snapshot.temperature_increment
 
 
 class AtaDeviceClimate(MelCloudClimate):
     """Air-to-Air climate device."""
 
-    def __init__(self, device: MelCloudDevice, ata_device: AtaDevice) -> None:
+    def __init__(
+        self,
+        coordinator: MelCloudCoordinator,
+        device: MelCloudDevice,
+        ata_device: AtaDevice,
+    ) -> None:
         """Initialize the climate."""
-        super().__init__(device)
+        super().__init__(coordinator, device)
         self._device = ata_device
+        self._attributes: dict[str, Any] = {}
+        self._attributes_snapshot: AtaSnapshot | None = None
 
     @property
     def unique_id(self) -> str | None:
@@ -146,28 +177,32 @@ class AtaDeviceClimate(MelCloudClimate):
         """Return the display name of this entity."""
         return self._name
 
+    @property
+    def _snapshot(self) -> AtaSnapshot:
+        """Return the latest snapshot of the device."""
+        return self.api.snapshot
+
     @property
     def extra_state_attributes(self) -> dict[str, Any] | None:
-        """Return the optional state attributes with device specific additions."""
-        attr = {}
+        """Return the optional state attributes with device specific additions.
 
-        vane_horizontal = self._device.vane_horizontal
-        if vane_horizontal:
-            attr.update(
-                {
-                    ATTR_VANE_HORIZONTAL: vane_horizontal,
-                    ATTR_VANE_HORIZONTAL_POSITIONS: self._device.vane_horizontal_positions,
-                }
-            )
+        The attributes are rebuilt only when the device state has changed.
+        """
+        snapshot = self._snapshot
+        if self._attributes_snapshot is snapshot:
+            return self._attributes
 
-        vane_vertical = self._device.vane_vertical
-        if vane_vertical:
-            attr.update(
-                {
-                    ATTR_VANE_VERTICAL: vane_vertical,
-                    ATTR_VANE_VERTICAL_POSITIONS: self._device.vane_vertical_positions,
-                }
+        attr = {}
+        if snapshot.vane_horizontal:
+            attr[ATTR_VANE_HORIZONTAL] = snapshot.vane_horizontal
+            attr[ATTR_VANE_HORIZONTAL_POSITIONS] = list(
+                snapshot.vane_horizontal_positions
             )
+        if snapshot.vane_vertical:
+            attr[ATTR_VANE_VERTICAL] = snapshot.vane_vertical
+            attr[ATTR_VANE_VERTICAL_POSITIONS] = list(snapshot.vane_vertical_positions)
+        self._attributes = attr
+        self._attributes_snapshot = snapshot
         return attr
 
     @property
@@ -178,15 +213,12 @@ class AtaDeviceClimate(MelCloudClimate):
     @property
     def hvac_mode(self) -> str:
         """Return hvac operation ie. heat, cool mode."""
-        mode = self._device.operation_mode
-        if not self._device.power or mode is None:
-            return HVAC_MODE_OFF
-        return ATA_HVAC_MODE_LOOKUP.get(mode)
+        return self._snapshot.hvac_mode
 
     async def async_set_hvac_mode(self, hvac_mode: str) -> None:
         """Set new target hvac mode."""
         if hvac_mode == HVAC_MODE_OFF:
-            await self._device.set({"power": False})
+            await self.api.async_set({"power": False})
             return
 
         operation_mode = ATA_HVAC_MODE_REVERSE_LOOKUP.get(hvac_mode)
@@ -196,66 +228,65 @@ class AtaDeviceClimate(MelCloudClimate):
         props = {"operation_mode": operation_mode}
         if self.hvac_mode == HVAC_MODE_OFF:
             props["power"] = True
-        await self._device.set(props)
+        await self.api.async_set(props)
 
     @property
     def hvac_modes(self) -> list[str]:
         """Return the list of available hvac operation modes."""
-        return [HVAC_MODE_OFF] + [
-            ATA_HVAC_MODE_LOOKUP.get(mode) for mode in self._device.operation_modes
-        ]
+        return list(self._snapshot.hvac_modes)
 
     @property
     def current_temperature(self) -> float | None:
         """Return the current temperature."""
-        return self._device.room_temperature
+        return self._snapshot.room_temperature
 
     @property
     def target_temperature(self) -> float | None:
         """Return the temperature we try to reach."""
-        return self._device.target_temperature
+        return self._snapshot.target_temperature
 
     async def async_set_temperature(self, **kwargs) -> None:
         """Set new target temperature."""
-        await self._device.set(
+        await self.api.async_set(
             {"target_temperature": kwargs.get("temperature", self.target_temperature)}
         )
 
     @property
     def fan_mode(self) -> str | None:
         """Return the fan setting."""
-        return self._device.fan_speed
+        return self._snapshot.fan_speed
 
     async def async_set_fan_mode(self, fan_mode: str) -> None:
         """Set new target fan mode."""
-        await self._device.set({"fan_speed": fan_mode})
+        await self.api.async_set({"fan_speed": fan_mode})
 
     @property
     def fan_modes(self) -> list[str] | None:
         """Return the list of available fan modes."""
-        return self._device.fan_speeds
+        fan_speeds = self._snapshot.fan_speeds
+        return None if fan_speeds is None else list(fan_speeds)
 
     async def async_set_vane_horizontal(self, position: str) -> None:
         """Set horizontal vane position."""
-        if position not in self._device.vane_horizontal_positions:
+        if position not in self._snapshot.vane_horizontal_positions:
             raise ValueError(
-                f"Invalid horizontal vane position {position}. Valid positions: [{self._device.vane_horizontal_positions}]."
+                f"Invalid horizontal vane position {position}. Valid positions: [{self._snapshot.vane_horizontal_positions}]."
             )
-        await self._device.set({ata.PROPERTY_VANE_HORIZONTAL: position})
+        await self.api.async_set({ata.PROPERTY_VANE_HORIZONTAL: position})
 
     async def async_set_vane_vertical(self, position: str) -> None:
         """Set vertical vane position."""
-        if position not in self._device.vane_vertical_positions:
+        if position not in self._snapshot.vane_vertical_positions:
             raise ValueError(
-                f"Invalid vertical vane position {position}. Valid positions: [{self._device.vane_vertical_positions}]."
+                f"Invalid vertical vane position {position}. Valid positions: [{self._snapshot.vane_vertical_positions}]."
             )
-        await self._device.set({ata.PROPERTY_VANE_VERTICAL: position})
+        await self.api.async_set({ata.PROPERTY_VANE_VERTICAL: position})
 
     @property
     def swing_mode(self) -> str | None:
 
         """Return vertical vane position or mode."""
-        return self._device.vane_vertical
+        return self._snapshot.vane_vertical
 
     async def async_set_swing_mode(self, swing_mode) -> None:
         """Set vertical vane position or mode."""
@@ -264,7 +295,7 @@ class AtaDeviceClimate(MelCloudClimate):
     @property
     def swing_modes(self) -> str | None:
         """Return a list of available vertical vane positions and modes."""
-        return self._device.vane_vertical_positions
+        return list(self._snapshot.vane_vertical_positions)
 
     @property
     def supported_features(self) -> int:
@@ -273,47 +304,53 @@ class AtaDeviceClimate(MelCloudClimate):
 
     async def async_turn_on(self) -> None:
         """Turn the entity on."""
-        await self._device.set({"power": True})
+        await self.api.async_set({"power": True})
 
     async def async_turn_off(self) -> None:
         """Turn the entity off."""
-        await self._device.set({"power": False})
+        await self.api.async_set({"power": False})
 
     @property
     def min_temp(self) -> float:
         """Return the minimum temperature."""
-        min_value = self._device.target_temperature_min
-        if min_value is not None:
-            return min_value
-
-        return DEFAULT_MIN_TEMP
+        return self._snapshot.min_temp
 
     @property
     def max_temp(self) -> float:
         """Return the maximum temperature."""
-        max_value = self._device.target_temperature_max
-        if max_value is not None:
-            return max_value
-
-        return DEFAULT_MAX_TEMP
+        return self._snapshot.max_temp
 
 
 class AtwDeviceZoneClimate(MelCloudClimate):
     """Air-to-Water zone climate device."""
 
     def __init__(
-        self, device: MelCloudDevice, atw_device: AtwDevice, atw_zone: atw.Zone
+        self,
+        coordinator: MelCloudCoordinator,
+        device: MelCloudDevice,
+        atw_device: AtwDevice,
+        atw_zone: atw.Zone,
     ) -> None:
         """Initialize the climate."""
-        super().__init__(device)
+        super().__init__(coordinator, device)
         self._device = atw_device
         self._zone = atw_zone
 
+    @property
+    def state_fingerprint(self) -> tuple:
+        """Return the fingerprint of the zone state."""
+        return self.api.zone_fingerprints[self._zone.zone_index]
+
+    @property
+    def _zone_state(self) -> ZoneSnapshot:
+        """Return the latest snapshot of the zone."""
+        return self.api.snapshot.zone(self._zone.zone_index)
+
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return the optional state attributes with device specific additions."""
         data = {
-            ATTR_STATUS: self._zone.status,
+            ATTR_STATUS: self._zone_state.status,
         }
         return data
 
@@ -332,10 +369,14 @@ class AtwDeviceZoneThermostatClimate(AtwDeviceZoneClimate):
     """Air-to-Water zone climate device."""
 
     def __init__(
-        self, device: MelCloudDevice, atw_device: AtwDevice, atw_zone: atw.Zone
+        self,
+        coordinator: MelCloudCoordinator,
+        device: MelCloudDevice,
+        atw_device: AtwDevice,
+        atw_zone: atw.Zone,
     ) -> None:
         """Initialize the climate."""
-        super().__init__(device, atw_device, atw_zone)
+        super().__init__(coordinator, device, atw_device, atw_zone)
 
     @property
     def unique_id(self) -> str | None:
@@ -350,8 +391,8 @@ class AtwDeviceZoneThermostatClimate(AtwDeviceZoneClimate):
     @property
     def hvac_mode(self) -> str:
         """Return hvac operation ie. heat, cool mode."""
-        op_mode = self._zone.operation_mode
-        if not self._device.power or op_mode is None:
+        op_mode = self._zone_state.operation_mode
+        if not self.api.snapshot.power or op_mode is None:
             return HVAC_MODE_OFF
 
         if op_mode == atw.ZONE_OPERATION_MODE_HEAT_THERMOSTAT:
@@ -376,13 +417,13 @@ class AtwDeviceZoneThermostatClimate(AtwDeviceZoneClimate):
         else:
             props = {atw.PROPERTY_ZONE_2_OPERATION_MODE: operation_mode}
 
-        await self._device.set(props)
+        await self.api.async_set(props)
 
     @property
     def hvac_modes(self) -> list[str]:
         """Return the list of available hvac operation modes."""
         modes = []
-        zone_modes = self._zone.operation_modes
+        zone_modes = self._zone_state.operation_modes
 
         if atw.ZONE_OPERATION_MODE_HEAT_THERMOSTAT in zone_modes:
             modes.append(HVAC_MODE_HEAT)
@@ -398,17 +439,22 @@ class AtwDeviceZoneThermostatClimate(AtwDeviceZoneClimate):
     @property
     def current_temperature(self) -> float | None:
         """Return the current temperature."""
-        return self._zone.room_temperature
+        return self._zone_state.room_temperature
 
     @property
     def target_temperature(self) -> float | None:
         """Return the temperature we try to reach."""
-        return self._zone.target_temperature
+        return self._zone_state.target_temperature
 
     async def async_set_temperature(self, **kwargs) -> None:
         """Set new target temperature."""
-        await self._zone.set_target_temperature(
-            kwargs.get("temperature", self.target_temperature)
+        if self._zone.zone_index == 1:
+            prop = atw.PROPERTY_ZONE_1_TARGET_TEMPERATURE
+        else:
+            prop = atw.PROPERTY_ZONE_2_TARGET_TEMPERATURE
+
+        await self.api.async_set(
+            {prop: kwargs.get("temperature", self.target_temperature)}
         )
 
     @property
@@ -433,13 +479,14 @@ class AtwDeviceZoneFlowClimate(AtwDeviceZoneClimate):
 
     def __init__(
         self,
+        coordinator: MelCloudCoordinator,
         device: MelCloudDevice,
         atw_device: AtwDevice,
         atw_zone: atw.Zone,
         flow_mode: str,
     ) -> None:
         """Initialize the climate."""
-        super().__init__(device, atw_device, atw_zone)
+        super().__init__(coordinator, device, atw_device, atw_zone)
         self._flow_mode = flow_mode
 
     @property
@@ -463,8 +510,8 @@ class AtwDeviceZoneFlowClimate(AtwDeviceZoneClimate):
     @property
     def hvac_mode(self) -> str:
         """Return hvac operation ie. heat, cool mode."""
-        op_mode = self._zone.operation_mode
-        if not self._device.power or op_mode is None:
+        op_mode = self._zone_state.operation_mode
+        if not self.api.snapshot.power or op_mode is None:
             return HVAC_MODE_OFF
 
         if (
@@ -495,13 +542,13 @@ class AtwDeviceZoneFlowClimate(AtwDeviceZoneClimate):
         else:
             props = {atw.PROPERTY_ZONE_2_OPERATION_MODE: operation_mode}
 
-        await self._device.set(props)
+        await self.api.async_set(props)
 
     @property
     def hvac_modes(self) -> list[str]:
         """Return the list of available hvac operation modes."""
         modes = []
-        zone_modes = self._zone.operation_modes
+        zone_modes = self._zone_state.operation_modes
 
         if (
             self._flow_mode == ATW_ZONE_FLOW_MODE_HEAT
@@ -523,26 +570,31 @@ class AtwDeviceZoneFlowClimate(AtwDeviceZoneClimate):
     @property
     def current_temperature(self) -> float | None:
         """Return the current temperature."""
-        return self._zone.flow_temperature
+        return self._zone_state.flow_temperature
 
     @property
     def target_temperature(self) -> float | None:
         """Return the temperature we try to reach."""
         if self._flow_mode == ATW_ZONE_FLOW_MODE_HEAT:
-            return self._zone.target_heat_flow_temperature
+            return self._zone_state.target_heat_flow_temperature
 
-        return self._zone.target_cool_flow_temperature
+        return self._zone_state.target_cool_flow_temperature
 
     async def async_set_temperature(self, **kwargs) -> None:
         """Set new target temperature."""
         if self._flow_mode == ATW_ZONE_FLOW_MODE_HEAT:
-            await self._zone.set_target_heat_flow_temperature(
-                kwargs.get("temperature", self.target_temperature)
-            )
+            if self._zone.zone_index == 1:
+                prop = atw.PROPERTY_ZONE_1_TARGET_HEAT_FLOW_TEMPERATURE
+            else:
+                prop = atw.PROPERTY_ZONE_2_TARGET_HEAT_FLOW_TEMPERATURE
+        elif self._zone.zone_index == 1:
+            prop = atw.PROPERTY_ZONE_1_TARGET_COOL_FLOW_TEMPERATURE
         else:
-            await self._zone.set_target_cool_flow_temperature(
-                kwargs.get("temperature", self.target_temperature)
-            )
+            prop = atw.PROPERTY_ZONE_2_TARGET_COOL_FLOW_TEMPERATURE
+
+        await self.api.async_set(
+            {prop: kwargs.get("temperature", self.target_temperature)}
+        )
 
     @property
     def min_temp(self) -> float:
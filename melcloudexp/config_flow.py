@@ -6,18 +6,40 @@ import asyncio
 from aiohttp import ClientError, ClientResponseError
 from async_timeout import timeout
 import pymelcloud
+from pymelcloud.client import Client
 import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import (
     CONF_PASSWORD,
+    CONF_SCAN_INTERVAL,
     CONF_TOKEN,
     CONF_USERNAME,
-    HTTP_FORBIDDEN,
-    HTTP_UNAUTHORIZED,
 )
+from homeassistant.core import callback
 
-from .const import DOMAIN
+from .account import discovery_from_client
+from .auth import is_auth_error
+from .const import (
+    CONF_BURST,
+    CONF_CONF_UPDATE_INTERVAL,
+    CONF_RATE_LIMIT,
+    CONF_REFRESH_MODE,
+    CONF_WRITE_DEBOUNCE,
+    DATA_DISCOVERY,
+    DEFAULT_BURST,
+    DEFAULT_CONF_UPDATE_INTERVAL,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_REFRESH_MODE,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_WRITE_DEBOUNCE,
+    DOMAIN,
+    MAX_SCAN_INTERVAL,
+    MAX_WRITE_DEBOUNCE,
+    MIN_SCAN_INTERVAL,
+    REFRESH_MODE_ACCOUNT,
+    REFRESH_MODE_DEVICE,
+)
 
 
 class FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -25,10 +47,22 @@ class FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
-    async def _create_entry(self, username: str, token: str):
+    _reauth_entry: config_entries.ConfigEntry | None = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
+    async def _create_entry(self, username: str, token: str, client: Client):
         """Register new entry."""
         await self.async_set_unique_id(username)
         self._abort_if_unique_id_configured({CONF_TOKEN: token})
+        # The setup of the new entry starts from the listing fetched here.
+        self.hass.data.setdefault(DATA_DISCOVERY, {})[username] = discovery_from_client(
+            client
+        )
         return self.async_create_entry(
             title=username, data={CONF_USERNAME: username, CONF_TOKEN: token}
         )
@@ -47,7 +81,7 @@ class FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             )
 
         try:
-            with timeout(10):
+            async with timeout(10):
                 acquired_token = token
                 if acquired_token is None:
                     acquired_token = await pymelcloud.login(
@@ -55,18 +89,19 @@ class FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                         password,
                         self.hass.helpers.aiohttp_client.async_get_clientsession(),
                     )
-                await pymelcloud.get_devices(
+                client = Client(
                     acquired_token,
                     self.hass.helpers.aiohttp_client.async_get_clientsession(),
                 )
+                await client.update_confs()
         except ClientResponseError as err:
-            if err.status == HTTP_UNAUTHORIZED or err.status == HTTP_FORBIDDEN:
+            if is_auth_error(err):
                 return self.async_abort(reason="invalid_auth")
             return self.async_abort(reason="cannot_connect")
         except (asyncio.TimeoutError, ClientError):
             return self.async_abort(reason="cannot_connect")
 
-        return await self._create_entry(username, acquired_token)
+        return await self._create_entry(username, acquired_token, client)
 
     async def async_step_user(self, user_input=None):
         """User initiated config flow."""
@@ -80,8 +115,122 @@ class FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         username = user_input[CONF_USERNAME]
         return await self._create_client(username, password=user_input[CONF_PASSWORD])
 
+    async def async_step_reauth(self, user_input=None):
+        """Ask for the password when MELCloud rejected the access token."""
+        self._reauth_entry = self.hass.config_entries.async_get_entry(
+            self.context["entry_id"]
+        )
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(self, user_input=None):
+        """Renew the access token of the entry.
+
+        A loaded entry picks the token up from the entry data without being
+        reloaded. An entry that failed to set up is reloaded.
+        """
+        entry = self._reauth_entry
+        username = entry.data[CONF_USERNAME]
+        errors = {}
+        if user_input is not None:
+            try:
+                async with timeout(10):
+                    token = await pymelcloud.login(
+                        username,
+                        user_input[CONF_PASSWORD],
+                        self.hass.helpers.aiohttp_client.async_get_clientsession(),
+                    )
+            except ClientResponseError as err:
+                errors["base"] = (
+                    "invalid_auth" if is_auth_error(err) else "cannot_connect"
+                )
+            except AttributeError:
+                # pymelcloud fails to read the missing token of a refused login.
+                errors["base"] = "invalid_auth"
+            except (asyncio.TimeoutError, ClientError):
+                errors["base"] = "cannot_connect"
+            else:
+                self.hass.config_entries.async_update_entry(
+                    entry, data={**entry.data, CONF_TOKEN: token}
+                )
+                if entry.state is not config_entries.ConfigEntryState.LOADED:
+                    self.hass.async_create_task(
+                        self.hass.config_entries.async_reload(entry.entry_id)
+                    )
+                return self.async_abort(reason="reauth_successful")
+
+        return self.async_show_form(
+            step_id="reauth_confirm",
+            data_schema=vol.Schema({vol.Required(CONF_PASSWORD): str}),
+            description_placeholders={CONF_USERNAME: username},
+            errors=errors,
+        )
+
     async def async_step_import(self, user_input):
         """Import a config entry."""
         return await self._create_client(
             user_input[CONF_USERNAME], token=user_input[CONF_TOKEN]
         )
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle MELCloud options."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_REFRESH_MODE,
+                        default=options.get(CONF_REFRESH_MODE, DEFAULT_REFRESH_MODE),
+                    ): vol.In(
+                        {
+                            REFRESH_MODE_DEVICE: "One request per device",
+                            REFRESH_MODE_ACCOUNT: "One request per account",
+                        }
+                    ),
+                    vol.Optional(
+                        CONF_RATE_LIMIT,
+                        default=options.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=600)),
+                    vol.Optional(
+                        CONF_BURST,
+                        default=options.get(CONF_BURST, DEFAULT_BURST),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                    vol.Optional(
+                        CONF_SCAN_INTERVAL,
+                        default=options.get(
+                            CONF_SCAN_INTERVAL,
+                            int(DEFAULT_SCAN_INTERVAL.total_seconds()),
+                        ),
+                    ): vol.All(
+                        vol.Coerce(int),
+                        vol.Range(min=MIN_SCAN_INTERVAL, max=MAX_SCAN_INTERVAL),
+                    ),
+                    vol.Optional(
+                        CONF_CONF_UPDATE_INTERVAL,
+                        default=options.get(
+                            CONF_CONF_UPDATE_INTERVAL,
+                            int(DEFAULT_CONF_UPDATE_INTERVAL.total_seconds() / 60),
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+                    vol.Optional(
+                        CONF_WRITE_DEBOUNCE,
+                        default=options.get(
+                            CONF_WRITE_DEBOUNCE, DEFAULT_WRITE_DEBOUNCE.total_seconds()
+                        ),
+                    ): vol.All(
+                        vol.Coerce(float), vol.Range(min=0, max=MAX_WRITE_DEBOUNCE)
+                    ),
+                }
+            ),
+        )
@@ -1,8 +1,58 @@
 """Constants for the MELCloud Climate integration."""
 
+from datetime import timedelta
+
 DOMAIN = "melcloudexp"
 
 CONF_POSITION = "position"
+CONF_REFRESH_MODE = "refresh_mode"
+CONF_RATE_LIMIT = "rate_limit"
+CONF_BURST = "burst"
+CONF_CONF_UPDATE_INTERVAL = "conf_update_interval"
+CONF_WRITE_DEBOUNCE = "write_debounce"
+
+REFRESH_MODE_DEVICE = "device"
+REFRESH_MODE_ACCOUNT = "account"
+DEFAULT_REFRESH_MODE = REFRESH_MODE_DEVICE
+
+# Requests per minute and account.
+DEFAULT_RATE_LIMIT = 120
+DEFAULT_BURST = 20
+
+# Refresh interval of a device, options in seconds.
+DEFAULT_SCAN_INTERVAL = timedelta(seconds=60)
+MIN_SCAN_INTERVAL = 10
+MAX_SCAN_INTERVAL = 300
+# Minimum time between device listings, options in minutes.
+DEFAULT_CONF_UPDATE_INTERVAL = timedelta(minutes=5)
+
+FAST_REFRESH_INTERVAL = timedelta(seconds=10)
+FAST_REFRESH_WINDOW = timedelta(minutes=2)
+IDLE_REFRESH_INTERVAL = timedelta(minutes=5)
+REPORT_MARGIN = timedelta(seconds=5)
+REFRESH_JITTER = timedelta(seconds=2)
+
+# Filtering of the temperature and energy sensor values.
+TEMPERATURE_DEADBAND = 0.5
+SENSOR_MIN_INTERVAL = timedelta(minutes=5)
+SENSOR_HEARTBEAT = timedelta(hours=1)
+
+REQUEST_TIMEOUT = 20
+# Time writes wait for further changes to merge, options in seconds.
+DEFAULT_WRITE_DEBOUNCE = timedelta(seconds=1)
+MAX_WRITE_DEBOUNCE = 10
+OPTIMISTIC_STATE_TIMEOUT = timedelta(minutes=3)
+QUEUED_WRITE_TIMEOUT = timedelta(minutes=30)
+# Time unreachable devices keep showing their last known state.
+UNREACHABLE_GRACE = timedelta(minutes=3)
+
+DEVICE_BACKOFF_BASE = timedelta(seconds=15)
+DEVICE_CIRCUIT_THRESHOLD = 5
+DEVICE_CIRCUIT_PROBE_INTERVAL = timedelta(minutes=2)
+ACCOUNT_BACKOFF_BASE = timedelta(seconds=2)
+ACCOUNT_CIRCUIT_THRESHOLD = 10
+ACCOUNT_CIRCUIT_PROBE_INTERVAL = timedelta(minutes=1)
+MAX_BACKOFF = timedelta(minutes=15)
 
 ATTR_STATUS = "status"
 ATTR_VANE_HORIZONTAL = "vane_horizontal"
@@ -12,3 +62,9 @@ ATTR_VANE_VERTICAL_POSITIONS = "vane_vertical_positions"
 
 SERVICE_SET_VANE_HORIZONTAL = "set_vane_horizontal"
 SERVICE_SET_VANE_VERTICAL = "set_vane_vertical"
+
+# Listings fetched by the config flow, keyed by unique ID until the first setup.
+DATA_DISCOVERY = f"{DOMAIN}_discovery"
+
+# Sent with a list of devices, suffixed with the config entry ID.
+SIGNAL_DEVICES_ADDED = f"{DOMAIN}_devices_added"
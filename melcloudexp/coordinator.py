@@ -0,0 +1,310 @@
+"""Update coordinator for the MELCloud Climate integration."""
+from __future__ import annotations
+
+from datetime import timedelta
+import hashlib
+import logging
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+import homeassistant.util.dt as dt_util
+
+from .account import (
+    MelCloudAccount,
+    async_refresh_account,
+    async_refresh_devices,
+    conf_key,
+)
+from .const import (
+    DOMAIN,
+    REFRESH_MODE_ACCOUNT,
+    REFRESH_MODE_DEVICE,
+    SIGNAL_DEVICES_ADDED,
+)
+from .schedule import RefreshSchedule
+
+if TYPE_CHECKING:
+    from . import MelCloudDevice
+    from .auth import AuthManager
+    from .cache import InventoryCache
+
+_LOGGER = logging.getLogger(__name__)
+
+# Devices falling due this close to each other are refreshed together.
+_REFRESH_TOLERANCE = timedelta(seconds=1)
+
+
+def refresh_phase(key: str) -> float:
+    """Return a stable position within the refresh interval for the key."""
+    digest = hashlib.sha256(key.encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
+
+
+class MelCloudCoordinator(DataUpdateCoordinator):
+    """Refresh schedule shared by every device of a config entry.
+
+    Each device has its own RefreshSchedule. The coordinator wakes up when the
+    next device falls due and only refreshes the devices that are due.
+
+    Refresh slots are derived from the device IDs, so devices are spread over
+    the interval the same way across restarts and config entries. In account
+    mode every device shares the slot of the account.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        devices: dict[str, list[MelCloudDevice]],
+        *,
+        update_interval: timedelta,
+        refresh_mode: str = REFRESH_MODE_DEVICE,
+        cache: InventoryCache | None = None,
+        discover: Callable[
+            [list[MelCloudDevice]], Awaitable[dict[str, list[MelCloudDevice]]]
+        ]
+        | None = None,
+        auth: AuthManager | None = None,
+        cached: bool = False,
+        account: MelCloudAccount | None = None,
+    ) -> None:
+        """Initialize the coordinator.
+
+        Devices restored from the inventory cache are checked against the
+        first listing fetched from MELCloud.
+        """
+        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=update_interval)
+        self.devices = devices
+        self.account = account
+        self.cache = cache
+        # Platforms loaded for the config entry.
+        self.platforms: set[str] = set()
+        self._interval = update_interval
+        self._discover = discover
+        self._cached_confs: list | None = None
+        if cached and self.all_devices:
+            self._cached_confs = self.all_devices[0].client.device_confs
+        self.schedules = {
+            device: RefreshSchedule(update_interval) for device in self.all_devices
+        }
+        self.refresh_mode = refresh_mode
+        # Devices started from the listing learn their unit models on the
+        # first refresh.
+        self._unknown_models = {
+            device for device in self.all_devices if device.device.units is None
+        }
+        for device in self.all_devices:
+            device.async_add_write_listener(self._async_device_written)
+        self.auth = auth
+        if auth is not None:
+            auth.async_add_listener(self._async_token_renewed)
+
+    @property
+    def refresh_mode(self) -> str:
+        """Return the refresh mode."""
+        return self._refresh_mode
+
+    @refresh_mode.setter
+    def refresh_mode(self, refresh_mode: str):
+        """Change the refresh mode and the refresh slots with it."""
+        self._refresh_mode = refresh_mode
+        for device in self.schedules:
+            self._set_phase(device)
+
+    @property
+    def interval(self) -> timedelta:
+        """Return the refresh interval of a device."""
+        return self._interval
+
+    @interval.setter
+    def interval(self, interval: timedelta):
+        """Change the refresh interval of every device."""
+        if interval == self._interval:
+            return
+        self._interval = interval
+        now = dt_util.utcnow()
+        for schedule in self.schedules.values():
+            schedule.set_interval(interval, now)
+        self._plan_next_refresh()
+        self._schedule_refresh()
+
+    def _set_phase(self, device: MelCloudDevice):
+        """Place the refresh slot of the device according to the refresh mode."""
+        if self.refresh_mode == REFRESH_MODE_ACCOUNT:
+            # The account is refreshed in the slot of its first device.
+            slot_device = self.all_devices[0]
+        else:
+            slot_device = device
+        self.schedules[device].phase = refresh_phase(
+            f"{slot_device.building_id}-{slot_device.device_id}"
+        )
+
+    def stagger(self):
+        """Spread the next refreshes of the devices over the interval."""
+        now = dt_util.utcnow()
+        for schedule in self.schedules.values():
+            schedule.stagger(now)
+        self._plan_next_refresh()
+
+    @property
+    def all_devices(self) -> list[MelCloudDevice]:
+        """Return devices of every type."""
+        return [device for devices in self.devices.values() for device in devices]
+
+    async def _async_update_data(self) -> dict[str, list[MelCloudDevice]]:
+        """Refresh the devices that are due.
+
+        In account mode the whole account is fetched with one request no matter
+        how many devices there are. An account without devices is listed every
+        conf update interval to find devices added later.
+        """
+        devices = self.all_devices
+        horizon = dt_util.utcnow() + _REFRESH_TOLERANCE
+        due = [device for device in devices if self.schedules[device].is_due(horizon)]
+        if due:
+            if self.refresh_mode == REFRESH_MODE_ACCOUNT:
+                due = devices
+            signatures = {device: device.state_signature for device in due}
+            if self.refresh_mode == REFRESH_MODE_ACCOUNT:
+                await async_refresh_account(devices[0].account, due)
+            else:
+                await async_refresh_devices(due)
+
+            now = dt_util.utcnow()
+            for device in due:
+                schedule = self.schedules[device]
+                schedule.refreshed(
+                    now,
+                    device.state_signature != signatures[device],
+                    device.next_communication,
+                )
+                schedule.defer(device.retry_at)
+
+            self._async_remove_unlisted_devices()
+            if self.cache is not None and any(
+                device.unreachable_since is None for device in due
+            ):
+                self.cache.async_schedule_save(self.all_devices)
+            self._async_update_models(
+                [device for device in due if device in self.schedules]
+            )
+        if self._discover is not None and (due or not self.all_devices):
+            self._async_add_devices(await self._discover(self.all_devices))
+
+        self._plan_next_refresh()
+        return self.devices
+
+    @callback
+    def _async_add_devices(self, new_devices: dict[str, list[MelCloudDevice]]):
+        """Start refreshing devices found after setup and announce them."""
+        added = [device for devices in new_devices.values() for device in devices]
+        if not added:
+            return
+        _LOGGER.info(
+            "Adding devices listed since setup: %s",
+            ", ".join(device.name for device in added),
+        )
+        now = dt_util.utcnow()
+        for device_type, devices in new_devices.items():
+            self.devices.setdefault(device_type, []).extend(devices)
+        for device in added:
+            self.schedules[device] = RefreshSchedule(self._interval)
+            self._set_phase(device)
+            self.schedules[device].stagger(now)
+            if device.device.units is None:
+                self._unknown_models.add(device)
+            device.async_add_write_listener(self._async_device_written)
+        if self.config_entry is not None:
+            async_dispatcher_send(
+                self.hass,
+                f"{SIGNAL_DEVICES_ADDED}_{self.config_entry.entry_id}",
+                added,
+            )
+
+    @callback
+    def _async_remove_unlisted_devices(self):
+        """Remove cached devices missing from the first fresh listing."""
+        if self._cached_confs is None:
+            return
+        client = self.all_devices[0].client
+        # The client replaces the restored confs once it has listed devices.
+        if client.device_confs is self._cached_confs:
+            return
+        self._cached_confs = None
+        listed = {conf_key(conf) for conf in client.device_confs}
+        removed = [
+            device
+            for device in self.all_devices
+            if (device.device_id, device.building_id) not in listed
+        ]
+        if not removed:
+            return
+        _LOGGER.info(
+            "Removing devices no longer listed on the account: %s",
+            ", ".join(device.name for device in removed),
+        )
+        for device_type, devices in self.devices.items():
+            self.devices[device_type] = [
+                device for device in devices if device not in removed
+            ]
+        device_registry = dr.async_get(self.hass)
+        for device in removed:
+            del self.schedules[device]
+            self._unknown_models.discard(device)
+            # Removing the registry device removes its entities as well.
+            registry_device = device_registry.async_get_device(
+                identifiers=device.device_info["identifiers"]
+            )
+            if registry_device is not None:
+                device_registry.async_remove_device(registry_device.id)
+        if self.cache is not None and not self.all_devices:
+            self.hass.async_create_task(self.cache.async_remove())
+
+    @callback
+    def _async_update_models(self, devices: list[MelCloudDevice]):
+        """Add the unit models fetched since setup to the device registry."""
+        device_registry = dr.async_get(self.hass)
+        for device in devices:
+            if device not in self._unknown_models or device.device.units is None:
+                continue
+            self._unknown_models.discard(device)
+            if self.config_entry is not None:
+                device_registry.async_get_or_create(
+                    config_entry_id=self.config_entry.entry_id, **device.device_info
+                )
+
+    def _plan_next_refresh(self):
+        """Wake up when the next device falls due."""
+        next_refresh = min(
+            (
+                schedule.next_refresh
+                for schedule in self.schedules.values()
+                if schedule.next_refresh is not None
+            ),
+            default=None,
+        )
+        if next_refresh is not None:
+            self.update_interval = max(
+                next_refresh - dt_util.utcnow(), _REFRESH_TOLERANCE
+            )
+
+    @callback
+    def _async_token_renewed(self, token: str):
+        """Retry every device with the renewed token.
+
+        Writes queued while the token was rejected are sent once the device
+        has been refreshed.
+        """
+        for schedule in self.schedules.values():
+            schedule.next_refresh = None
+        self.hass.async_create_task(self.async_refresh())
+
+    @callback
+    def _async_device_written(self, device: MelCloudDevice):
+        """Confirm a write with fast refreshes and publish the written state."""
+        self.schedules[device].written(dt_util.utcnow())
+        self._plan_next_refresh()
+        self._schedule_refresh()
+        self.async_update_listeners()
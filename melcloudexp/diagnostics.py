@@ -0,0 +1,64 @@
+"""Diagnostics support for the MELCloud Climate integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_TOKEN, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {CONF_TOKEN, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    devices = coordinator.all_devices
+    account = None
+    if devices:
+        account = {
+            "circuit_state": devices[0].account.circuit_state,
+            "retry_at": devices[0].account.breaker.retry_at,
+            "metrics": devices[0].account.metrics.as_dict(),
+            "rate_limit": {
+                "rate": devices[0].account.limiter.rate,
+                "current_rate": devices[0].account.limiter.current_rate,
+                "burst": devices[0].account.limiter.burst,
+                "queued": devices[0].account.limiter.queued,
+            },
+        }
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "refresh_mode": coordinator.refresh_mode,
+        "update_interval": coordinator.update_interval,
+        "last_update_success": coordinator.last_update_success,
+        "auth_failed": coordinator.auth.failed,
+        "account": account,
+        "devices": [
+            {
+                "name": device.name,
+                "device_id": device.device_id,
+                "building_id": device.building_id,
+                "device_type": device.device.device_type,
+                "available": device.available,
+                "reported_offline": device.reported_offline,
+                "unreachable_since": device.unreachable_since,
+                "queued_writes": device.queued_writes,
+                "circuit_state": device.circuit_state,
+                "retry_at": device.retry_at,
+                "last_communication": device.last_communication,
+                "next_communication": device.next_communication,
+                "next_refresh": coordinator.schedules[device].next_refresh,
+                "metrics": device.metrics.as_dict(),
+            }
+            for device in devices
+        ],
+    }
@@ -0,0 +1,37 @@
+"""Base entity for the MELCloud Climate integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+
+class MelCloudEntity(CoordinatorEntity):
+    """Coordinator entity writing its state only when its inputs changed.
+
+    Most refreshes return the same data for most devices. Comparing a cheap
+    fingerprint avoids rendering and writing the unchanged state of every
+    entity on every refresh.
+    """
+
+    _written_fingerprint: Any = None
+
+    @property
+    def state_fingerprint(self) -> Any:
+        """Return a value that changes whenever the entity state may change."""
+        raise NotImplementedError
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the inputs of the state written when added."""
+        await super().async_added_to_hass()
+        self._written_fingerprint = (self.available, self.state_fingerprint)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state if the inputs of the entity have changed."""
+        fingerprint = (self.available, self.state_fingerprint)
+        if fingerprint == self._written_fingerprint:
+            return
+        self._written_fingerprint = fingerprint
+        super()._handle_coordinator_update()
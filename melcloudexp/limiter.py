@@ -0,0 +1,100 @@
+"""Request rate limiting for MELCloud accounts."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+
+PRIORITY_WRITE = 0
+PRIORITY_REFRESH = 1
+
+# Lowest rate the limiter slows down to, in requests per second.
+MIN_RATE = 1 / 60
+
+
+class RequestLimiter:
+    """Token bucket shared by every request made for a MELCloud account.
+
+    Requests take a token each. Tokens are refilled at the configured rate up
+    to burst tokens. Waiting requests are let through by priority, so writes
+    requested by the user go ahead of queued background refreshes.
+
+    The rate is halved when MELCloud signals overload and recovers gradually
+    while requests succeed.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """Initialize the limiter with a rate in requests per second."""
+        self.rate = rate
+        self.burst = burst
+        self.current_rate = rate
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._wakeup: asyncio.TimerHandle | None = None
+
+    @property
+    def queued(self) -> int:
+        """Return the number of requests waiting for a token."""
+        return sum(not future.done() for _, _, future in self._waiters)
+
+    def configure(self, rate: float, burst: int):
+        """Change the limits."""
+        self.rate = rate
+        self.burst = burst
+        self.current_rate = min(self.current_rate, rate)
+        self._refill()
+        self._release()
+
+    async def acquire(self, priority: int = PRIORITY_REFRESH):
+        """Wait until a request of the given priority may be sent."""
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._release()
+        await future
+
+    def slow_down(self):
+        """Halve the rate after MELCloud signalled overload."""
+        self.current_rate = max(self.current_rate / 2, MIN_RATE)
+
+    def speed_up(self):
+        """Recover the rate after a successful request."""
+        self.current_rate = min(self.current_rate + self.rate / 20, self.rate)
+
+    def _refill(self):
+        """Add the tokens accumulated since the last refill."""
+        now = time.monotonic()
+        self._tokens = min(
+            self._tokens + (now - self._updated) * self.current_rate, self.burst
+        )
+        self._updated = now
+
+    def _release(self):
+        """Let waiting requests through while there are tokens."""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        self._refill()
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():
+                # Cancelled while waiting.
+                heapq.heappop(self._waiters)
+                continue
+            if self._tokens < 1:
+                break
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            future.set_result(None)
+
+        if self._waiters:
+            self._wakeup = asyncio.get_running_loop().call_later(
+                (1 - self._tokens) / self.current_rate, self._release
+            )
@@ -0,0 +1,106 @@
+"""Request metrics for MELCloud devices."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any
+
+from aiohttp import ClientResponseError
+
+KIND_REFRESH = "refresh"
+KIND_WRITE = "write"
+
+# Upper bounds of the latency histogram buckets in seconds.
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+
+# Recent latencies kept for percentiles.
+LATENCY_SAMPLES = 100
+
+
+def error_class(err: Exception) -> str:
+    """Return a short description of the kind of error."""
+    if isinstance(err, ClientResponseError):
+        return f"HTTP {err.status}"
+    return type(err).__name__
+
+
+class LatencyHistogram:
+    """Distribution of request latencies."""
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.recent: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    @property
+    def count(self) -> int:
+        """Return the number of recorded requests."""
+        return sum(self.counts)
+
+    def record(self, seconds: float):
+        """Record the latency of a request."""
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def percentile(self, share: float) -> float | None:
+        """Return a percentile of the recent latencies in seconds."""
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[round(share * (len(ordered) - 1))]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram for diagnostics."""
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 3),
+            "buckets": {
+                f"le_{bound}": count
+                for bound, count in zip(LATENCY_BUCKETS + ("inf",), self.counts)
+            },
+            "p50_seconds": self.percentile(0.5),
+            "p99_seconds": self.percentile(0.99),
+        }
+
+
+class RequestMetrics:
+    """Latencies and outcomes of the requests made for a device or account."""
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.latency = {
+            KIND_REFRESH: LatencyHistogram(),
+            KIND_WRITE: LatencyHistogram(),
+        }
+        self.successes: Counter[str] = Counter()
+        self.failures: Counter[str] = Counter()
+        self.last_refresh: datetime | None = None
+
+    @property
+    def failure_count(self) -> int:
+        """Return the number of failed requests."""
+        return sum(self.failures.values())
+
+    def record_success(self, kind: str, seconds: float, now: datetime):
+        """Record a successful request."""
+        self.latency[kind].record(seconds)
+        self.successes[kind] += 1
+        if kind == KIND_REFRESH:
+            self.last_refresh = now
+
+    def record_failure(self, kind: str, seconds: float, err: Exception):
+        """Record a failed request."""
+        self.latency[kind].record(seconds)
+        self.failures[error_class(err)] += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics for diagnostics."""
+        return {
+            "latency": {kind: item.as_dict() for kind, item in self.latency.items()},
+            "successes": dict(self.successes),
+            "failures": dict(self.failures),
+            "last_refresh": self.last_refresh,
+        }
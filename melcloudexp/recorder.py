@@ -0,0 +1,12 @@
+"""Integration platform for recorder."""
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import ATTR_VANE_HORIZONTAL_POSITIONS, ATTR_VANE_VERTICAL_POSITIONS
+
+
+@callback
+def exclude_attributes(hass: HomeAssistant) -> set[str]:
+    """Exclude the static lists of vane positions from being recorded."""
+    return {ATTR_VANE_HORIZONTAL_POSITIONS, ATTR_VANE_VERTICAL_POSITIONS}
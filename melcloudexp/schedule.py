@@ -0,0 +1,119 @@
+"""Refresh scheduling for MELCloud devices."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import random
+
+from .const import (
+    FAST_REFRESH_INTERVAL,
+    FAST_REFRESH_WINDOW,
+    IDLE_REFRESH_INTERVAL,
+    REFRESH_JITTER,
+    REPORT_MARGIN,
+)
+
+
+class RefreshSchedule:
+    """Adaptive refresh timing of a single device.
+
+    A device is polled at a fast pace for a while after it has been written to
+    so that the change gets confirmed. Otherwise the refresh is timed to land
+    just after the unit is expected to report to MELCloud next, as polling
+    between two reports returns the same data again. When the next report time
+    is not known and polls keep returning the same state, the interval doubles
+    until it reaches the idle interval.
+
+    Refreshes that are not tied to a report are moved to the closest slot of
+    the device. Slots repeat every interval at the given phase, a fraction of
+    the interval, so devices with different phases spread evenly over the
+    interval instead of refreshing in the same second.
+    """
+
+    def __init__(
+        self,
+        interval: timedelta,
+        *,
+        fast_interval: timedelta = FAST_REFRESH_INTERVAL,
+        fast_window: timedelta = FAST_REFRESH_WINDOW,
+        idle_interval: timedelta = IDLE_REFRESH_INTERVAL,
+        phase: float = 0.0,
+    ) -> None:
+        """Initialize the schedule. The device is due right away."""
+        self.interval = interval
+        self.phase = phase
+        self.fast_interval = fast_interval
+        self.fast_window = fast_window
+        self.idle_interval = idle_interval
+        self.next_refresh: datetime | None = None
+        self._current = interval
+        self._fast_until: datetime | None = None
+
+    def set_interval(self, interval: timedelta, now: datetime):
+        """Change the interval, moving a later refresh to the next slot."""
+        self.interval = interval
+        self._current = min(self._current, interval)
+        if self.next_refresh is not None and self.next_refresh > now + interval:
+            self.stagger(now)
+
+    def stagger(self, now: datetime):
+        """Postpone the next refresh to the next slot of the device."""
+        period = self.interval.total_seconds()
+        offset = (now.timestamp() - self.phase * period) % period
+        self.next_refresh = now + timedelta(seconds=(period - offset) % period)
+
+    def is_due(self, now: datetime) -> bool:
+        """Return True if the device should be refreshed."""
+        return self.next_refresh is None or self.next_refresh <= now
+
+    def written(self, now: datetime):
+        """Poll fast to confirm a write."""
+        self._fast_until = now + self.fast_window
+        self._current = self.interval
+        fast_refresh = now + self.fast_interval
+        if self.next_refresh is None or fast_refresh < self.next_refresh:
+            self.next_refresh = fast_refresh
+
+    def refreshed(
+        self, now: datetime, changed: bool, next_report: datetime | None = None
+    ):
+        """Plan the next refresh after a completed one."""
+        if self._fast_until is not None and now < self._fast_until:
+            self.next_refresh = now + self.fast_interval
+            return
+
+        self._fast_until = None
+        if next_report is not None:
+            self._current = self.interval
+            if next_report <= now:
+                # The report is overdue and may arrive at any time.
+                self.next_refresh = self._slot(now + self.interval)
+                return
+            next_refresh = next_report + REPORT_MARGIN
+            earliest = now + self.fast_interval
+            if next_refresh < earliest:
+                # Devices reporting right after the refresh would all meet at
+                # the earliest time. Spread them over the fast interval.
+                next_refresh = earliest + self.fast_interval * self.phase
+            self.next_refresh = min(next_refresh, now + self.idle_interval)
+            return
+
+        if changed:
+            self._current = self.interval
+        else:
+            self._current = min(self._current * 2, self.idle_interval)
+        self.next_refresh = self._slot(now + self._current)
+
+    def _slot(self, target: datetime) -> datetime:
+        """Return the slot of the device closest to the target, with jitter."""
+        period = self.interval.total_seconds()
+        offset = (target.timestamp() - self.phase * period) % period
+        shift = -offset if offset < period / 2 else period - offset
+        jitter = random.uniform(0, REFRESH_JITTER.total_seconds())
+        return target + timedelta(seconds=shift + jitter)
+
+    def defer(self, until: datetime | None):
+        """Hold off the next refresh while requests are backing off."""
+        if until is not None and (
+            self.next_refresh is None or until > self.next_refresh
+        ):
+            self.next_refresh = until
@@ -1,4 +1,8 @@
 """Support for MelCloud device sensors."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
 from pymelcloud import DEVICE_TYPE_ATA, DEVICE_TYPE_ATW
 from pymelcloud.atw_device import Zone
 
@@ -7,17 +11,63 @@ from homeassistant.const import (
     ATTR_DEVICE_CLASS,
     ATTR_ICON,
     DEVICE_CLASS_TEMPERATURE,
+    DEVICE_CLASS_TIMESTAMP,
     ENERGY_KILO_WATT_HOUR,
     TEMP_CELSIUS,
+    TIME_MILLISECONDS,
 )
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.util import dt as dt_util
 
 from . import MelCloudDevice
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    SENSOR_HEARTBEAT,
+    SENSOR_MIN_INTERVAL,
+    SIGNAL_DEVICES_ADDED,
+    TEMPERATURE_DEADBAND,
+)
+from .coordinator import MelCloudCoordinator
+from .entity import MelCloudEntity
+from .metrics import KIND_REFRESH, KIND_WRITE, LatencyHistogram
 
 ATTR_MEASUREMENT_NAME = "measurement_name"
 ATTR_UNIT = "unit"
 ATTR_VALUE_FN = "value_fn"
 ATTR_ENABLED_FN = "enabled"
+ATTR_ATTRIBUTES_FN = "attributes_fn"
+ATTR_DEADBAND = "deadband"
+ATTR_MIN_INTERVAL = "min_interval"
+ATTR_HEARTBEAT = "heartbeat"
+
+TEMPERATURE_FILTER = {
+    ATTR_DEADBAND: TEMPERATURE_DEADBAND,
+    ATTR_MIN_INTERVAL: SENSOR_MIN_INTERVAL,
+    ATTR_HEARTBEAT: SENSOR_HEARTBEAT,
+}
+
+
+def _isoformat(value: datetime | None):
+    """Return a timestamp sensor state."""
+    if value is None:
+        return None
+    return value.isoformat()
+
+
+def _latency_ms(histogram: LatencyHistogram, share: float):
+    """Return a latency percentile in milliseconds."""
+    seconds = histogram.percentile(share)
+    if seconds is None:
+        return None
+    return round(seconds * 1000)
+
+
+def _latency_attributes(histogram: LatencyHistogram):
+    """Return the state attributes of a latency sensor."""
+    return {"p99": _latency_ms(histogram, 0.99), "count": histogram.count}
+
 
 ATA_SENSORS = {
     "room_temperature": {
@@ -25,16 +75,20 @@ ATA_SENSORS = {
         ATTR_ICON: "mdi:thermometer",
         ATTR_UNIT: TEMP_CELSIUS,
         ATTR_DEVICE_CLASS: DEVICE_CLASS_TEMPERATURE,
-        ATTR_VALUE_FN: lambda x: x.device.room_temperature,
+        ATTR_VALUE_FN: lambda x: x.snapshot.room_temperature,
         ATTR_ENABLED_FN: lambda x: True,
+        **TEMPERATURE_FILTER,
     },
     "energy": {
         ATTR_MEASUREMENT_NAME: "Energy",
         ATTR_ICON: "mdi:factory",
         ATTR_UNIT: ENERGY_KILO_WATT_HOUR,
         ATTR_DEVICE_CLASS: None,
-        ATTR_VALUE_FN: lambda x: x.device.total_energy_consumed,
-        ATTR_ENABLED_FN: lambda x: x.device.has_energy_consumed_meter,
+        ATTR_VALUE_FN: lambda x: x.snapshot.total_energy_consumed,
+        ATTR_ENABLED_FN: lambda x: x.snapshot.has_energy_consumed_meter,
+        ATTR_DEADBAND: 0.1,
+        ATTR_MIN_INTERVAL: SENSOR_MIN_INTERVAL,
+        ATTR_HEARTBEAT: SENSOR_HEARTBEAT,
     },
 }
 ATW_SENSORS = {
@@ -43,15 +97,66 @@ ATW_SENSORS = {
         ATTR_ICON: "mdi:thermometer",
         ATTR_UNIT: TEMP_CELSIUS,
         ATTR_DEVICE_CLASS: DEVICE_CLASS_TEMPERATURE,
-        ATTR_VALUE_FN: lambda x: x.device.outside_temperature,
+        ATTR_VALUE_FN: lambda x: x.snapshot.outside_temperature,
         ATTR_ENABLED_FN: lambda x: True,
+        **TEMPERATURE_FILTER,
     },
     "tank_temperature": {
         ATTR_MEASUREMENT_NAME: "Tank Temperature",
         ATTR_ICON: "mdi:thermometer",
         ATTR_UNIT: TEMP_CELSIUS,
         ATTR_DEVICE_CLASS: DEVICE_CLASS_TEMPERATURE,
-        ATTR_VALUE_FN: lambda x: x.device.tank_temperature,
+        ATTR_VALUE_FN: lambda x: x.snapshot.tank_temperature,
+        ATTR_ENABLED_FN: lambda x: True,
+        **TEMPERATURE_FILTER,
+    },
+}
+DIAGNOSTIC_SENSORS = {
+    "connection": {
+        ATTR_MEASUREMENT_NAME: "Connection",
+        ATTR_ICON: "mdi:cloud-check",
+        ATTR_UNIT: None,
+        ATTR_DEVICE_CLASS: None,
+        ATTR_VALUE_FN: lambda x: x.circuit_state,
+        ATTR_ENABLED_FN: lambda x: True,
+    },
+    "last_refresh": {
+        ATTR_MEASUREMENT_NAME: "Last Refresh",
+        ATTR_ICON: "mdi:clock-check-outline",
+        ATTR_UNIT: None,
+        ATTR_DEVICE_CLASS: DEVICE_CLASS_TIMESTAMP,
+        ATTR_VALUE_FN: lambda x: _isoformat(x.metrics.last_refresh),
+        ATTR_ENABLED_FN: lambda x: True,
+    },
+    "refresh_latency": {
+        ATTR_MEASUREMENT_NAME: "Refresh Latency",
+        ATTR_ICON: "mdi:timer-outline",
+        ATTR_UNIT: TIME_MILLISECONDS,
+        ATTR_DEVICE_CLASS: None,
+        ATTR_VALUE_FN: lambda x: _latency_ms(x.metrics.latency[KIND_REFRESH], 0.5),
+        ATTR_ATTRIBUTES_FN: lambda x: _latency_attributes(
+            x.metrics.latency[KIND_REFRESH]
+        ),
+        ATTR_ENABLED_FN: lambda x: True,
+    },
+    "write_latency": {
+        ATTR_MEASUREMENT_NAME: "Write Latency",
+        ATTR_ICON: "mdi:timer-outline",
+        ATTR_UNIT: TIME_MILLISECONDS,
+        ATTR_DEVICE_CLASS: None,
+        ATTR_VALUE_FN: lambda x: _latency_ms(x.metrics.latency[KIND_WRITE], 0.5),
+        ATTR_ATTRIBUTES_FN: lambda x: _latency_attributes(
+            x.metrics.latency[KIND_WRITE]
+        ),
+        ATTR_ENABLED_FN: lambda x: True,
+    },
+    "failed_requests": {
+        ATTR_MEASUREMENT_NAME: "Failed Requests",
+        ATTR_ICON: "mdi:cloud-alert",
+        ATTR_UNIT: None,
+        ATTR_DEVICE_CLASS: None,
+        ATTR_VALUE_FN: lambda x: x.metrics.failure_count,
+        ATTR_ATTRIBUTES_FN: lambda x: dict(x.metrics.failures),
         ATTR_ENABLED_FN: lambda x: True,
     },
 }
@@ -63,6 +168,7 @@ ATW_ZONE_SENSORS = {
         ATTR_DEVICE_CLASS: DEVICE_CLASS_TEMPERATURE,
         ATTR_VALUE_FN: lambda zone: zone.room_temperature,
         ATTR_ENABLED_FN: lambda x: True,
+        **TEMPERATURE_FILTER,
     },
     "flow_temperature": {
         ATTR_MEASUREMENT_NAME: "Flow Temperature",
@@ -71,6 +177,7 @@ ATW_ZONE_SENSORS = {
         ATTR_DEVICE_CLASS: DEVICE_CLASS_TEMPERATURE,
         ATTR_VALUE_FN: lambda zone: zone.flow_temperature,
         ATTR_ENABLED_FN: lambda x: True,
+        **TEMPERATURE_FILTER,
     },
     "return_temperature": {
         ATTR_MEASUREMENT_NAME: "Flow Return Temperature",
@@ -79,46 +186,90 @@ ATW_ZONE_SENSORS = {
         ATTR_DEVICE_CLASS: DEVICE_CLASS_TEMPERATURE,
         ATTR_VALUE_FN: lambda zone: zone.return_temperature,
         ATTR_ENABLED_FN: lambda x: True,
+        **TEMPERATURE_FILTER,
     },
 }
 
 
-async def async_setup_entry(hass, entry, async_add_entities):
-    """Set up MELCloud device sensors based on config_entry."""
-    mel_devices = hass.data[DOMAIN].get(entry.entry_id)
-    async_add_entities(
-        [
-            MelDeviceSensor(mel_device, measurement, definition)
+def _device_entities(
+    coordinator: MelCloudCoordinator, mel_device: MelCloudDevice
+) -> list[MelDeviceSensor]:
+    """Create the sensors of a device."""
+    entities: list[MelDeviceSensor] = []
+    if mel_device.device.device_type == DEVICE_TYPE_ATA:
+        entities.extend(
+            MelDeviceSensor(coordinator, mel_device, measurement, definition)
             for measurement, definition in ATA_SENSORS.items()
-            for mel_device in mel_devices[DEVICE_TYPE_ATA]
             if definition[ATTR_ENABLED_FN](mel_device)
-        ]
-        + [
-            MelDeviceSensor(mel_device, measurement, definition)
+        )
+    if mel_device.device.device_type == DEVICE_TYPE_ATW:
+        entities.extend(
+            MelDeviceSensor(coordinator, mel_device, measurement, definition)
             for measurement, definition in ATW_SENSORS.items()
-            for mel_device in mel_devices[DEVICE_TYPE_ATW]
             if definition[ATTR_ENABLED_FN](mel_device)
-        ]
-        + [
-            AtwZoneSensor(mel_device, zone, measurement, definition)
-            for mel_device in mel_devices[DEVICE_TYPE_ATW]
+        )
+        entities.extend(
+            AtwZoneSensor(coordinator, mel_device, zone, measurement, definition)
             for zone in mel_device.device.zones
             for measurement, definition, in ATW_ZONE_SENSORS.items()
             if definition[ATTR_ENABLED_FN](zone)
-        ],
-        True,
+        )
+    entities.extend(
+        MelDeviceDiagnosticSensor(coordinator, mel_device, measurement, definition)
+        for measurement, definition in DIAGNOSTIC_SENSORS.items()
+        if definition[ATTR_ENABLED_FN](mel_device)
+    )
+    return entities
+
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    """Set up MELCloud device sensors based on config_entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def async_add_devices(mel_devices: list[MelCloudDevice]):
+        """Add the sensors of the devices."""
+        async_add_entities(
+            [
+                entity
+                for mel_device in mel_devices
+                for entity in _device_entities(coordinator, mel_device)
+            ]
+        )
+
+    async_add_devices(coordinator.all_devices)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, f"{SIGNAL_DEVICES_ADDED}_{entry.entry_id}", async_add_devices
+        )
     )
 
 
-class MelDeviceSensor(SensorEntity):
-    """Representation of a Sensor."""
+class MelDeviceSensor(MelCloudEntity, SensorEntity):
+    """Representation of a Sensor.
 
-    def __init__(self, api: MelCloudDevice, measurement, definition):
+    A new value is published only once it differs from the published one by
+    the deadband of the definition and the minimum interval has passed since
+    the last publish. The value is published again after the heartbeat
+    interval even if it has not moved, so the history keeps a recent row.
+    """
+
+    def __init__(
+        self,
+        coordinator: MelCloudCoordinator,
+        api: MelCloudDevice,
+        measurement,
+        definition,
+    ):
         """Initialize the sensor."""
+        super().__init__(coordinator)
         self._api = api
         self._name_slug = api.name
         self._measurement = measurement
         self._def = definition
+        self._value = None
+        self._published_at: datetime | None = None
+        self._heartbeat = False
 
     @property
     def unique_id(self):
@@ -138,8 +289,55 @@ class MelDeviceSensor(SensorEntity):
     @property
     def state(self):
         """Return the state of the sensor."""
+        return self._value
+
+    @property
+    def force_update(self) -> bool:
+        """Return True to record a heartbeat of an unchanged value."""
+        return self._heartbeat
+
+    def _current_value(self):
+        """Return the latest value reported by the device."""
         return self._def[ATTR_VALUE_FN](self._api)
 
+    async def async_added_to_hass(self) -> None:
+        """Publish the initial value."""
+        self._publish(self._current_value(), dt_util.utcnow())
+        await super().async_added_to_hass()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Publish the latest value if it passes the filter."""
+        value = self._current_value()
+        now = dt_util.utcnow()
+        if self._should_publish(value, now):
+            self._publish(value, now)
+        super()._handle_coordinator_update()
+        self._heartbeat = False
+
+    def _should_publish(self, value, now: datetime) -> bool:
+        """Return True if the value should replace the published value."""
+        heartbeat: timedelta | None = self._def.get(ATTR_HEARTBEAT)
+        elapsed = now - self._published_at
+        if heartbeat is not None and elapsed >= heartbeat:
+            return True
+        if not isinstance(value, (int, float)) or not isinstance(
+            self._value, (int, float)
+        ):
+            return value != self._value
+        if elapsed < self._def.get(ATTR_MIN_INTERVAL, timedelta(0)):
+            return False
+        deadband = self._def.get(ATTR_DEADBAND)
+        if deadband is None:
+            return value != self._value
+        return abs(value - self._value) >= deadband
+
+    def _publish(self, value, now: datetime):
+        """Replace the published value."""
+        self._heartbeat = value == self._value and self._published_at is not None
+        self._value = value
+        self._published_at = now
+
     @property
     def unit_of_measurement(self):
         """Return the unit of measurement."""
@@ -150,9 +348,15 @@ class MelDeviceSensor(SensorEntity):
         """Return device class."""
         return self._def[ATTR_DEVICE_CLASS]
 
-    async def async_update(self):
-        """Retrieve latest state."""
-        await self._api.async_update()
+    @property
+    def available(self) -> bool:
+        """Return True if entity is available."""
+        return super().available and self._api.available
+
+    @property
+    def state_fingerprint(self):
+        """Return the published value and when it was published."""
+        return self._value, self._published_at
 
     @property
     def device_info(self):
@@ -163,13 +367,54 @@ class MelDeviceSensor(SensorEntity):
 class AtwZoneSensor(MelDeviceSensor):
     """Air-to-Air device sensor."""
 
-    def __init__(self, api: MelCloudDevice, zone: Zone, measurement, definition):
+    def __init__(
+        self,
+        coordinator: MelCloudCoordinator,
+        api: MelCloudDevice,
+        zone: Zone,
+        measurement,
+        definition,
+    ):
         """Initialize the sensor."""
-        super().__init__(api, measurement, definition)
+        super().__init__(coordinator, api, measurement, definition)
         self._zone = zone
         self._name_slug = f"{api.name} {zone.name}"
 
+    def _current_value(self):
+        """Return the latest value reported for the zone."""
+        return self._def[ATTR_VALUE_FN](self._api.snapshot.zone(self._zone.zone_index))
+
+
+class MelDeviceDiagnosticSensor(MelDeviceSensor):
+    """Diagnostic sensor describing the connection to MELCloud."""
+
     @property
-    def state(self):
-        """Return zone based state."""
-        return self._def[ATTR_VALUE_FN](self._zone)
+    def extra_state_attributes(self):
+        """Return the state attributes."""
+        attributes_fn = self._def.get(ATTR_ATTRIBUTES_FN)
+        if attributes_fn is None:
+            return None
+        return attributes_fn(self._api)
+
+    @property
+    def available(self) -> bool:
+        """Return True if entity is available.
+
+        Diagnostics stay available while the device itself is not.
+        """
+        return self.coordinator.last_update_success
+
+    @property
+    def state_fingerprint(self):
+        """Return the state and attributes, which do not follow device state."""
+        return self.state, repr(self.extra_state_attributes)
+
+    @property
+    def entity_category(self):
+        """Return the category of the entity."""
+        return EntityCategory.DIAGNOSTIC
+
+    @property
+    def entity_registry_enabled_default(self) -> bool:
+        """Return if the entity should be enabled when first added."""
+        return False
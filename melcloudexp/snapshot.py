@@ -0,0 +1,180 @@
+"""Immutable snapshots of MELCloud device state read by the entities."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from pymelcloud import AtaDevice, AtwDevice, Device
+import pymelcloud.ata_device as ata
+from pymelcloud.atw_device import Zone
+
+from homeassistant.components.climate.const import (
+    DEFAULT_MAX_TEMP,
+    DEFAULT_MIN_TEMP,
+    HVAC_MODE_COOL,
+    HVAC_MODE_DRY,
+    HVAC_MODE_FAN_ONLY,
+    HVAC_MODE_HEAT,
+    HVAC_MODE_HEAT_COOL,
+    HVAC_MODE_OFF,
+)
+
+ATA_HVAC_MODE_LOOKUP = {
+    ata.OPERATION_MODE_HEAT: HVAC_MODE_HEAT,
+    ata.OPERATION_MODE_DRY: HVAC_MODE_DRY,
+    ata.OPERATION_MODE_COOL: HVAC_MODE_COOL,
+    ata.OPERATION_MODE_FAN_ONLY: HVAC_MODE_FAN_ONLY,
+    ata.OPERATION_MODE_HEAT_COOL: HVAC_MODE_HEAT_COOL,
+}
+ATA_HVAC_MODE_REVERSE_LOOKUP = {v: k for k, v in ATA_HVAC_MODE_LOOKUP.items()}
+
+
+@dataclass(frozen=True)
+class DeviceSnapshot:
+    """Read-only values taken from a device when its state changed.
+
+    Entities read the snapshot instead of the live pymelcloud device, so
+    values derived from the device state are computed once per change and
+    every property read during one state write sees the same state. This
+    class holds the values common to every device type.
+    """
+
+    device_info: dict[str, Any]
+    power: bool | None
+    temperature_increment: float | None
+
+
+@dataclass(frozen=True)
+class AtaSnapshot(DeviceSnapshot):
+    """Values of an Air-to-Air device."""
+
+    fan_speed: str | None
+    fan_speeds: tuple[str, ...] | None
+    has_energy_consumed_meter: bool
+    hvac_mode: str | None
+    hvac_modes: tuple[str, ...]
+    max_temp: float
+    min_temp: float
+    room_temperature: float | None
+    target_temperature: float | None
+    total_energy_consumed: float | None
+    vane_horizontal: str | None
+    vane_horizontal_positions: tuple[str, ...]
+    vane_vertical: str | None
+    vane_vertical_positions: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class ZoneSnapshot:
+    """Values of an Air-to-Water zone."""
+
+    flow_temperature: float | None
+    name: str | None
+    operation_mode: str | None
+    operation_modes: tuple[str, ...]
+    return_temperature: float | None
+    room_temperature: float | None
+    status: str | None
+    target_cool_flow_temperature: float | None
+    target_heat_flow_temperature: float | None
+    target_temperature: float | None
+    zone_index: int
+
+
+@dataclass(frozen=True)
+class AtwSnapshot(DeviceSnapshot):
+    """Values of an Air-to-Water device."""
+
+    operation_mode: str | None
+    operation_modes: tuple[str, ...]
+    outside_temperature: float | None
+    status: str | None
+    tank_temperature: float | None
+    target_tank_temperature: float | None
+    target_tank_temperature_max: float | None
+    target_tank_temperature_min: float | None
+    zones: tuple[ZoneSnapshot, ...]
+
+    def zone(self, zone_index: int) -> ZoneSnapshot:
+        """Return the snapshot of a zone."""
+        return next(zone for zone in self.zones if zone.zone_index == zone_index)
+
+
+def _ata_snapshot(device: AtaDevice, device_info: dict[str, Any]) -> AtaSnapshot:
+    """Take a snapshot of an Air-to-Air device."""
+    operation_mode = device.operation_mode
+    if not device.power or operation_mode is None:
+        hvac_mode = HVAC_MODE_OFF
+    else:
+        hvac_mode = ATA_HVAC_MODE_LOOKUP.get(operation_mode)
+    min_temp = device.target_temperature_min
+    max_temp = device.target_temperature_max
+    fan_speeds = device.fan_speeds
+    return AtaSnapshot(
+        device_info=device_info,
+        power=device.power,
+        temperature_increment=device.temperature_increment,
+        fan_speed=device.fan_speed,
+        fan_speeds=None if fan_speeds is None else tuple(fan_speeds),
+        has_energy_consumed_meter=device.has_energy_consumed_meter,
+        hvac_mode=hvac_mode,
+        hvac_modes=(HVAC_MODE_OFF,)
+        + tuple(ATA_HVAC_MODE_LOOKUP.get(mode) for mode in device.operation_modes),
+        max_temp=DEFAULT_MAX_TEMP if max_temp is None else max_temp,
+        min_temp=DEFAULT_MIN_TEMP if min_temp is None else min_temp,
+        room_temperature=device.room_temperature,
+        target_temperature=device.target_temperature,
+        total_energy_consumed=device.total_energy_consumed,
+        vane_horizontal=device.vane_horizontal,
+        vane_horizontal_positions=tuple(device.vane_horizontal_positions),
+        vane_vertical=device.vane_vertical,
+        vane_vertical_positions=tuple(device.vane_vertical_positions),
+    )
+
+
+def _zone_snapshot(zone: Zone) -> ZoneSnapshot:
+    """Take a snapshot of an Air-to-Water zone."""
+    return ZoneSnapshot(
+        flow_temperature=zone.flow_temperature,
+        name=zone.name,
+        operation_mode=zone.operation_mode,
+        operation_modes=tuple(zone.operation_modes),
+        return_temperature=zone.return_temperature,
+        room_temperature=zone.room_temperature,
+        status=zone.status,
+        target_cool_flow_temperature=zone.target_cool_flow_temperature,
+        target_heat_flow_temperature=zone.target_heat_flow_temperature,
+        target_temperature=zone.target_temperature,
+        zone_index=zone.zone_index,
+    )
+
+
+def _atw_snapshot(device: AtwDevice, device_info: dict[str, Any]) -> AtwSnapshot:
+    """Take a snapshot of an Air-to-Water device."""
+    return AtwSnapshot(
+        device_info=device_info,
+        power=device.power,
+        temperature_increment=device.temperature_increment,
+        operation_mode=device.operation_mode,
+        operation_modes=tuple(device.operation_modes),
+        outside_temperature=device.outside_temperature,
+        status=device.status,
+        tank_temperature=device.tank_temperature,
+        target_tank_temperature=device.target_tank_temperature,
+        target_tank_temperature_max=device.target_tank_temperature_max,
+        target_tank_temperature_min=device.target_tank_temperature_min,
+        zones=tuple(_zone_snapshot(zone) for zone in device.zones),
+    )
+
+
+def take_snapshot(device: Device, device_info: dict[str, Any]) -> DeviceSnapshot:
+    """Take a snapshot of the current state of a device."""
+    if isinstance(device, AtaDevice):
+        return _ata_snapshot(device, device_info)
+    if isinstance(device, AtwDevice):
+        return _atw_snapshot(device, device_info)
+    return DeviceSnapshot(
+        device_info=device_info,
+        power=device.power,
+        temperature_increment=device.temperature_increment,
+    )
@@ -0,0 +1,32 @@
+"""Helpers for the MELCloud Climate integration."""
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Generic, TypeVar
+
+_T = TypeVar("_T")
+
+
+class SingleFlight(Generic[_T]):
+    """Share a single in-flight call between concurrent callers.
+
+    A caller arriving while the call is running awaits the pending result
+    instead of starting another one. Cancelling a caller does not cancel the
+    shared call.
+    """
+
+    def __init__(self, func: Callable[[], Awaitable[_T]]) -> None:
+        """Initialize the wrapper."""
+        self._func = func
+        self._task: asyncio.Future[_T] | None = None
+
+    @property
+    def in_flight(self) -> bool:
+        """Return True if a call is running."""
+        return self._task is not None and not self._task.done()
+
+    async def __call__(self) -> _T:
+        """Start the call or join the one in flight."""
+        if not self.in_flight:
+            self._task = asyncio.ensure_future(self._func())
+        return await asyncio.shield(self._task)
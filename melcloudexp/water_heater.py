@@ -15,38 +15,67 @@ from homeassistant.components.water_heater import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import TEMP_CELSIUS
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from . import DOMAIN, MelCloudDevice
-from .const import ATTR_STATUS
+from .const import ATTR_STATUS, SIGNAL_DEVICES_ADDED
+from .coordinator import MelCloudCoordinator
+from .entity import MelCloudEntity
+from .snapshot import AtwSnapshot
 
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities
 ):
     """Set up MelCloud device climate based on config_entry."""
-    mel_devices = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities(
-        [
-            AtwWaterHeater(mel_device, mel_device.device)
-            for mel_device in mel_devices[DEVICE_TYPE_ATW]
-        ],
-        True,
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def async_add_devices(mel_devices: list[MelCloudDevice]):
+        """Add the water heaters of the devices."""
+        async_add_entities(
+            [
+                AtwWaterHeater(coordinator, mel_device, mel_device.device)
+                for mel_device in mel_devices
+                if mel_device.device.device_type == DEVICE_TYPE_ATW
+            ]
+        )
+
+    async_add_devices(coordinator.all_devices)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, f"{SIGNAL_DEVICES_ADDED}_{entry.entry_id}", async_add_devices
+        )
     )
 
 
-class AtwWaterHeater(WaterHeaterEntity):
+class AtwWaterHeater(MelCloudEntity, WaterHeaterEntity):
     """Air-to-Water water heater."""
 
-    def __init__(self, api: MelCloudDevice, device: AtwDevice) -> None:
+    def __init__(
+        self, coordinator: MelCloudCoordinator, api: MelCloudDevice, device: AtwDevice
+    ) -> None:
         """Initialize water heater device."""
+        super().__init__(coordinator)
         self._api = api
         self._device = device
         self._name = device.name
 
-    async def async_update(self):
-        """Update state from MELCloud."""
-        await self._api.async_update()
+    @property
+    def available(self) -> bool:
+        """Return True if entity is available."""
+        return super().available and self._api.available
+
+    @property
+    def state_fingerprint(self) -> tuple:
+        """Return the fingerprint of the device state."""
+        return self._api.fingerprint
+
+    @property
+    def _snapshot(self) -> AtwSnapshot:
+        """Return the latest snapshot of the device."""
+        return self._api.snapshot
 
     @property
     def unique_id(self) -> str | None:
@@ -65,16 +94,16 @@ class AtwWaterHeater(WaterHeaterEntity):
 
     async def async_turn_on(self) -> None:
         """Turn the entity on."""
-        await self._device.set({PROPERTY_POWER: True})
+        await self._api.async_set({PROPERTY_POWER: True})
 
     async def async_turn_off(self) -> None:
         """Turn the entity off."""
-        await self._device.set({PROPERTY_POWER: False})
+        await self._api.async_set({PROPERTY_POWER: False})
 
     @property
     def extra_state_attributes(self):
         """Return the optional state attributes with device specific additions."""
-        data = {ATTR_STATUS: self._device.status}
+        data = {ATTR_STATUS: self._snapshot.status}
         return data
 
     @property
@@ -85,26 +114,26 @@ class AtwWaterHeater(WaterHeaterEntity):
     @property
     def current_operation(self) -> str | None:
         """Return current operation as reported by pymelcloud."""
-        return self._device.operation_mode
+        return self._snapshot.operation_mode
 
     @property
     def operation_list(self) -> list[str]:
         """Return the list of available operation modes as reported by pymelcloud."""
-        return self._device.operation_modes
+        return list(self._snapshot.operation_modes)
 
     @property
     def current_temperature(self) -> float | None:
         """Return the current temperature."""
-        return self._device.tank_temperature
+        return self._snapshot.tank_temperature
 
     @property
     def target_temperature(self):
         """Return the temperature we try to reach."""
-        return self._device.target_tank_temperature
+        return self._snapshot.target_tank_temperature
 
     async def async_set_temperature(self, **kwargs):
         """Set new target temperature."""
-        await self._device.set(
+        await self._api.async_set(
             {
                 PROPERTY_TARGET_TANK_TEMPERATURE: kwargs.get(
                     "temperature", self.target_temperature
@@ -114,7 +143,7 @@ class AtwWaterHeater(WaterHeaterEntity):
 
     async def async_set_operation_mode(self, operation_mode):
         """Set new target operation mode."""
-        await self._device.set({PROPERTY_OPERATION_MODE: operation_mode})
+        await self._api.async_set({PROPERTY_OPERATION_MODE: operation_mode})
 
     @property
     def supported_features(self):
@@ -124,9 +153,9 @@ class AtwWaterHeater(WaterHeaterEntity):
     @property
     def min_temp(self) -> float | None:
         """Return the minimum temperature."""
-        return self._device.target_tank_temperature_min
+        return self._snapshot.target_tank_temperature_min
 
     @property
     def max_temp(self) -> float | None:
         """Return the maximum temperature."""
-        return self._device.target_tank_temperature_max
+        return self._snapshot.target_tank_temperature_max
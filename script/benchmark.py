@@ -0,0 +1,218 @@
+"""Benchmark the integration against the fake MELCloud.
+
+For each fleet size the integration is set up in a fresh Home Assistant
+instance and the following are reported:
+
+- wall clock time of the config entry setup
+- HTTP requests and wall clock time of a refresh cycle covering every device,
+  in both refresh modes
+- p50 and p99 latency from a climate.set_temperature call until MELCloud
+  has accepted the write
+- peak memory allocated by Python during setup and the measurements
+- optionally the peak and mean request rate while the integration runs on its
+  own, which should stay flat as refreshes are spread over the interval
+
+Run from the repository root with Home Assistant and pymelcloud installed:
+
+    python -m script.benchmark --latency 0.1 --json results.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import time
+import tracemalloc
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from melcloudexp.const import (
+    CONF_BURST,
+    CONF_RATE_LIMIT,
+    DOMAIN,
+    REFRESH_MODE_ACCOUNT,
+    REFRESH_MODE_DEVICE,
+)
+
+from .fake_melcloud import FakeMelCloud, use_fake_melcloud
+from .harness import async_home_assistant, async_setup_integration
+
+FLEET_SIZES = [1, 10, 100, 500]
+
+
+def percentile(values: list[float], share: float) -> float:
+    """Return the nearest rank percentile of the values."""
+    ordered = sorted(values)
+    return ordered[round(share * (len(ordered) - 1))]
+
+
+async def _refresh_cycle(
+    hass: HomeAssistant, fake: FakeMelCloud, mode: str
+) -> tuple[int, float]:
+    """Return the requests and seconds of a refresh cycle covering every device."""
+    coordinator = next(iter(hass.data[DOMAIN].values()))
+    coordinator.refresh_mode = mode
+    for schedule in coordinator.schedules.values():
+        schedule.next_refresh = None
+    fake.requests.clear()
+    start = time.perf_counter()
+    await coordinator.async_refresh()
+    return fake.request_count, time.perf_counter() - start
+
+
+async def _request_rate(fake: FakeMelCloud, seconds: float) -> tuple[int, float]:
+    """Return the peak requests per second and the mean rate over a while."""
+    start = time.monotonic()
+    fake.request_times.clear()
+    await asyncio.sleep(seconds)
+    per_second = [0] * math.ceil(seconds)
+    for request_time in fake.request_times:
+        per_second[min(int(request_time - start), len(per_second) - 1)] += 1
+    return max(per_second), sum(per_second) / seconds
+
+
+async def _write_latencies(hass: HomeAssistant, writes: int) -> list[float]:
+    """Return seconds from each set_temperature call until it was sent."""
+    entity_ids = hass.states.async_entity_ids("climate")
+
+    async def write(index: int) -> float:
+        start = time.perf_counter()
+        await hass.services.async_call(
+            "climate",
+            "set_temperature",
+            {"entity_id": entity_ids[index % len(entity_ids)], "temperature": 21},
+            blocking=True,
+        )
+        return time.perf_counter() - start
+
+    if not entity_ids:
+        return []
+    return await asyncio.gather(*[write(index) for index in range(writes)])
+
+
+async def _measure(fleet_size: int, args, *, memory: bool) -> dict[str, Any]:
+    """Run the measurements for a fleet."""
+    atw = round(fleet_size * args.atw_share)
+    fake = FakeMelCloud(ata=fleet_size - atw, atw=atw, latency=args.latency)
+    url = await fake.async_start()
+    if memory:
+        tracemalloc.start()
+    try:
+        with use_fake_melcloud(url):
+            async with async_home_assistant() as hass:
+                start = time.perf_counter()
+                await async_setup_integration(
+                    hass, {CONF_RATE_LIMIT: args.rate_limit, CONF_BURST: args.burst}
+                )
+                result = {
+                    "devices": fleet_size,
+                    "setup_seconds": time.perf_counter() - start,
+                    "setup_requests": fake.request_count,
+                    "entities": len(hass.states.async_all()),
+                }
+                if args.observe:
+                    (
+                        result["peak_requests_per_second"],
+                        result["mean_requests_per_second"],
+                    ) = await _request_rate(fake, args.observe)
+                # Devices fetch their unit models on the first refresh, which
+                # is not part of a steady refresh cycle.
+                await _refresh_cycle(hass, fake, REFRESH_MODE_DEVICE)
+                for mode in (REFRESH_MODE_DEVICE, REFRESH_MODE_ACCOUNT):
+                    (
+                        result[f"{mode}_refresh_requests"],
+                        result[f"{mode}_refresh_seconds"],
+                    ) = await _refresh_cycle(hass, fake, mode)
+                fake.requests.clear()
+                latencies = await _write_latencies(hass, args.writes)
+                if latencies:
+                    result["write_p50_seconds"] = percentile(latencies, 0.5)
+                    result["write_p99_seconds"] = percentile(latencies, 0.99)
+                result["write_requests"] = fake.request_count
+                if memory:
+                    result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        return result
+    finally:
+        if memory:
+            tracemalloc.stop()
+        await fake.async_stop()
+
+
+async def main(args):
+    """Run the benchmark."""
+    results = []
+    print(
+        f"{'devices':>8} {'setup s':>8} {'entities':>9} {'device req':>11}"
+        f" {'device s':>9} {'account req':>12} {'account s':>10}"
+        f" {'write p50':>10} {'write p99':>10} {'peak MiB':>9}"
+    )
+    for fleet_size in args.devices:
+        result = await _measure(fleet_size, args, memory=False)
+        if not args.no_memory:
+            # Tracing allocations slows everything down, so it gets its own run.
+            memory = await _measure(fleet_size, args, memory=True)
+            result["peak_memory_bytes"] = memory["peak_memory_bytes"]
+        results.append(result)
+        print(
+            f"{fleet_size:>8} {result['setup_seconds']:>8.2f}"
+            f" {result['entities']:>9}"
+            f" {result[f'{REFRESH_MODE_DEVICE}_refresh_requests']:>11}"
+            f" {result[f'{REFRESH_MODE_DEVICE}_refresh_seconds']:>9.3f}"
+            f" {result[f'{REFRESH_MODE_ACCOUNT}_refresh_requests']:>12}"
+            f" {result[f'{REFRESH_MODE_ACCOUNT}_refresh_seconds']:>10.3f}"
+            f" {result.get('write_p50_seconds', float('nan')):>10.3f}"
+            f" {result.get('write_p99_seconds', float('nan')):>10.3f}"
+            f" {result.get('peak_memory_bytes', float('nan')) / 2**20:>9.1f}"
+        )
+        if "peak_requests_per_second" in result:
+            print(
+                f"{'':>8} requests per second: peak"
+                f" {result['peak_requests_per_second']},"
+                f" mean {result['mean_requests_per_second']:.2f}"
+            )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--devices",
+        type=int,
+        nargs="+",
+        default=FLEET_SIZES,
+        help="fleet sizes to measure",
+    )
+    parser.add_argument(
+        "--atw-share",
+        type=float,
+        default=0.2,
+        help="share of ATW devices in the fleet",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.1, help="seconds per request"
+    )
+    parser.add_argument(
+        "--writes", type=int, default=100, help="concurrent writes to measure"
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the peak memory run"
+    )
+    parser.add_argument(
+        "--observe",
+        type=float,
+        default=0,
+        help="seconds to observe the request rate after setup",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=6000,
+        help="requests per minute allowed by the integration",
+    )
+    parser.add_argument("--burst", type=int, default=1000, help="request burst allowed")
+    parser.add_argument("--json", help="write the results to this file")
+    asyncio.run(main(parser.parse_args()))
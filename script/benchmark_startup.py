@@ -0,0 +1,175 @@
+"""Benchmark the startup cost of the integration.
+
+For an ATA only account and optionally a mixed one, the following are
+reported:
+
+- wall clock time of the config entry setup against the fake MELCloud and the
+  platforms it loaded
+- import time of the integration and the loaded platforms, from
+  python -X importtime in a fresh interpreter. Modules Home Assistant has
+  loaded before any integration are imported first and not counted.
+
+Run from the repository root with Home Assistant and pymelcloud installed:
+
+    python -m script.benchmark_startup --json startup.json
+
+Pass --max-import-ms to fail when an import got slower than allowed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any
+
+from melcloudexp.const import DOMAIN
+
+from .fake_melcloud import FakeMelCloud, use_fake_melcloud
+from .harness import async_home_assistant, async_setup_integration
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded by Home Assistant before it sets up a config entry.
+BASELINE_MODULES = [
+    "aiohttp",
+    "voluptuous",
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+]
+
+PLATFORMS = ["climate", "sensor", "water_heater"]
+
+_MARKER = "melcloud-benchmark-start"
+
+
+def import_times(platforms: list[str]) -> dict[str, float]:
+    """Return milliseconds spent importing the integration and the platforms."""
+    modules = [DOMAIN] + [f"{DOMAIN}.{platform}" for platform in platforms]
+    code = "\n".join(
+        [f"import sys; sys.path.insert(0, {ROOT!r})"]
+        + [f"import {module}" for module in BASELINE_MODULES]
+        + [f"sys.stderr.write({_MARKER!r} + '\\n')"]
+        + [f"import {module}" for module in modules]
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    lines = result.stderr.split(_MARKER, 1)[1].splitlines()
+    times = {module: 0.0 for module in modules}
+    total = 0.0
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith("   "):
+            # Nested imports are part of the cumulative time of their parent.
+            continue
+        name = name.strip()
+        total += int(cumulative) / 1000
+        if name in times:
+            times[name] = int(cumulative) / 1000
+    times["total"] = total
+    return times
+
+
+def median_import_times(platforms: list[str], runs: int) -> dict[str, float]:
+    """Return the median import times over a few interpreters."""
+    samples = [import_times(platforms) for _ in range(runs)]
+    return {
+        module: statistics.median(sample[module] for sample in samples)
+        for module in samples[0]
+    }
+
+
+async def measure_setup(ata: int, atw: int) -> dict[str, Any]:
+    """Return the setup time of an account and the platforms it loaded."""
+    fake = FakeMelCloud(ata=ata, atw=atw)
+    url = await fake.async_start()
+    try:
+        with use_fake_melcloud(url):
+            async with async_home_assistant() as hass:
+                start = time.perf_counter()
+                await async_setup_integration(hass)
+                setup_seconds = time.perf_counter() - start
+                prefix = f"custom_components.{DOMAIN}."
+                platforms = sorted(
+                    name[len(prefix) :]
+                    for name in sys.modules
+                    if name.startswith(prefix) and name[len(prefix) :] in PLATFORMS
+                )
+                return {
+                    "ata": ata,
+                    "atw": atw,
+                    "setup_seconds": setup_seconds,
+                    "platforms": platforms,
+                }
+    finally:
+        await fake.async_stop()
+
+
+async def main(args) -> int:
+    """Run the benchmark and return the exit code."""
+    results = []
+    for atw in sorted({0, args.atw}):
+        result = await measure_setup(args.ata, atw)
+        result["import_ms"] = median_import_times(result["platforms"], args.runs)
+        results.append(result)
+        print(
+            f"{result['ata']} ATA and {result['atw']} ATW devices:"
+            f" setup {result['setup_seconds']:.3f} s,"
+            f" platforms {', '.join(result['platforms'])}"
+        )
+        for module, milliseconds in result["import_ms"].items():
+            print(f"{'':>4} {module:<24} {milliseconds:>7.1f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.max_import_ms is not None:
+        slow = [
+            result
+            for result in results
+            if result["import_ms"]["total"] > args.max_import_ms
+        ]
+        for result in slow:
+            print(
+                f"Import time of {result['ata']} ATA and {result['atw']} ATW devices"
+                f" above {args.max_import_ms} ms"
+            )
+        if slow:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ata", type=int, default=50, help="number of ATA devices")
+    parser.add_argument(
+        "--atw",
+        type=int,
+        default=0,
+        help="number of ATW devices in a second, mixed setup",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=5, help="interpreters started per scenario"
+    )
+    parser.add_argument(
+        "--max-import-ms",
+        type=float,
+        help="fail when the imports of a setup take longer than this",
+    )
+    parser.add_argument("--json", help="write the results to this file")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,438 @@
+"""Local stand-in for the MELCloud API.
+
+Serves a synthetic fleet of ATA and ATW devices over the endpoints used by
+pymelcloud. Devices are spread over buildings, floors and areas. ATA devices
+have vanes and energy meters, ATW devices have one or two zones and a tank.
+Every request can be delayed to simulate the latency of the real service.
+
+Run from the repository root with Home Assistant and pymelcloud installed:
+
+    python -m script.fake_melcloud --ata 100 --atw 20 --latency 0.2
+
+pymelcloud is pointed at the fake with use_fake_melcloud(). The username and
+password of the fake are "user@example.com" and "password".
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import random
+import time
+from typing import Any, Iterator
+
+from aiohttp import web
+import pymelcloud.client
+
+USERNAME = "user@example.com"
+PASSWORD = "password"
+TOKEN = "fake-melcloud-token"
+
+API_PATH = "/Mitsubishi.Wifi.Client"
+
+DEVICE_TYPE_ATA = 0
+DEVICE_TYPE_ATW = 1
+
+DEVICES_PER_BUILDING = 50
+
+# Device/Get reports a few values under different keys than ListDevices.
+_LISTING_KEYS = {
+    "SetFanSpeed": "FanSpeed",
+    "VaneHorizontal": "VaneHorizontalDirection",
+    "VaneVertical": "VaneVerticalDirection",
+}
+
+# Values of a device that MELCloud only reports in the listing.
+_ATA_STATIC = {
+    "DeviceType": DEVICE_TYPE_ATA,
+    "CanCool": True,
+    "CanHeat": True,
+    "CanDry": True,
+    "ModelSupportsAuto": True,
+    "HasAutomaticFanSpeed": True,
+    "ModelSupportsVaneHorizontal": True,
+    "ModelSupportsVaneVertical": True,
+    "SwingFunction": True,
+    "TemperatureIncrement": 0.5,
+    "MinTempCoolDry": 16,
+    "MaxTempCoolDry": 31,
+    "MinTempHeat": 10,
+    "MaxTempHeat": 31,
+    "MinTempAutomatic": 16,
+    "MaxTempAutomatic": 31,
+}
+
+_ATW_STATIC = {
+    "DeviceType": DEVICE_TYPE_ATW,
+    "CanCool": False,
+    "CanHeat": True,
+    "HasThermostatZone1": True,
+    "MaxTankTemperature": 60,
+    "TemperatureIncrement": 0.5,
+    "FlowTemperature": 35.0,
+    "ReturnTemperature": 30.0,
+}
+
+# Keys MELCloud accepts from SetAta and SetAtw requests.
+_WRITABLE_KEYS = {
+    DEVICE_TYPE_ATA: {
+        "Power",
+        "OperationMode",
+        "SetTemperature",
+        "SetFanSpeed",
+        "VaneHorizontal",
+        "VaneVertical",
+    },
+    DEVICE_TYPE_ATW: {
+        "Power",
+        "ForcedHotWaterMode",
+        "SetTankWaterTemperature",
+        "SetTemperatureZone1",
+        "SetTemperatureZone2",
+        "SetHeatFlowTemperatureZone1",
+        "SetHeatFlowTemperatureZone2",
+        "SetCoolFlowTemperatureZone1",
+        "SetCoolFlowTemperatureZone2",
+        "OperationModeZone1",
+        "OperationModeZone2",
+    },
+}
+
+
+def _timestamp(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+class FakeDevice:
+    """Synthetic device with its listing entry and state."""
+
+    def __init__(self, device_id: int, device_type: int, rng: random.Random) -> None:
+        """Initialize the device."""
+        self.device_id = device_id
+        self.device_type = device_type
+        self.building_id = device_id // DEVICES_PER_BUILDING + 1
+        self.report_interval = timedelta(seconds=60)
+        self.reported_at = datetime.utcnow() - timedelta(seconds=rng.uniform(0, 60))
+        self.energy = rng.randrange(100_000, 5_000_000)
+        if device_type == DEVICE_TYPE_ATA:
+            self.static = {**_ATA_STATIC, "HasEnergyConsumedMeter": device_id % 2 == 0}
+            self.state = {
+                "Power": True,
+                "OperationMode": rng.choice([1, 3, 8]),
+                "RoomTemperature": round(rng.uniform(18, 25), 1),
+                "SetTemperature": 22.0,
+                "SetFanSpeed": 0,
+                "NumberOfFanSpeeds": 5,
+                "VaneHorizontal": 0,
+                "VaneVertical": 0,
+            }
+        else:
+            has_zone2 = device_id % 2 == 0
+            self.static = {
+                **_ATW_STATIC,
+                "HasZone2": has_zone2,
+                "HasThermostatZone2": has_zone2,
+            }
+            self.state = {
+                "Power": True,
+                "OperationMode": 2,
+                "ForcedHotWaterMode": False,
+                "HolidayMode": False,
+                "OutdoorTemperature": round(rng.uniform(-10, 10), 1),
+                "TankWaterTemperature": round(rng.uniform(40, 55), 1),
+                "SetTankWaterTemperature": 50.0,
+            }
+            for zone in (1, 2) if has_zone2 else (1,):
+                self.static[f"FlowTemperatureZone{zone}"] = 35.0
+                self.static[f"ReturnTemperatureZone{zone}"] = 30.0
+                self.state.update(
+                    {
+                        f"RoomTemperatureZone{zone}": round(rng.uniform(18, 23), 1),
+                        f"SetTemperatureZone{zone}": 21.0,
+                        f"SetHeatFlowTemperatureZone{zone}": 35.0,
+                        f"SetCoolFlowTemperatureZone{zone}": 20.0,
+                        f"OperationModeZone{zone}": 0,
+                        f"ProhibitZone{zone}": False,
+                        f"IdleZone{zone}": False,
+                    }
+                )
+        self.state.update(
+            {
+                "DeviceID": device_id,
+                "DeviceType": device_type,
+                "EffectiveFlags": 0,
+                "HasPendingCommand": False,
+                "Offline": False,
+            }
+        )
+
+    @property
+    def kind(self) -> str:
+        """Return a short name of the device type."""
+        return "ata" if self.device_type == DEVICE_TYPE_ATA else "atw"
+
+    def _report(self):
+        """Advance the report timestamps to the latest report."""
+        now = datetime.utcnow()
+        while self.reported_at + self.report_interval <= now:
+            self.reported_at += self.report_interval
+            self.energy += 10
+        self.state["LastCommunication"] = _timestamp(self.reported_at)
+        self.state["NextCommunication"] = _timestamp(
+            self.reported_at + self.report_interval
+        )
+
+    def get(self) -> dict[str, Any]:
+        """Return the Device/Get response."""
+        self._report()
+        return dict(self.state)
+
+    def conf(self) -> dict[str, Any]:
+        """Return the ListDevices entry."""
+        self._report()
+        device = {
+            **self.static,
+            **{_LISTING_KEYS.get(key, key): value for key, value in self.state.items()},
+        }
+        if self.device_type == DEVICE_TYPE_ATA:
+            device["CurrentEnergyConsumed"] = self.energy
+        conf = {
+            "DeviceID": self.device_id,
+            "DeviceName": f"{self.kind.upper()} {self.device_id}",
+            "BuildingID": self.building_id,
+            "MacAddress": (
+                f"02:00:00:{self.device_id >> 16 & 0xff:02x}:"
+                f"{self.device_id >> 8 & 0xff:02x}:{self.device_id & 0xff:02x}"
+            ),
+            "SerialNumber": f"{self.device_id:010d}",
+            "HideVaneControls": False,
+            "Device": device,
+        }
+        if self.device_type == DEVICE_TYPE_ATW:
+            conf["Zone1Name"] = "Ground floor"
+            if self.static["HasZone2"]:
+                conf["Zone2Name"] = "First floor"
+        return conf
+
+    def units(self) -> list[dict[str, Any]]:
+        """Return the ListDeviceUnits response."""
+        model = "MSZ-LN25VG" if self.device_type == DEVICE_TYPE_ATA else "EHST20C"
+        return [
+            {
+                "Model": model,
+                "ModelNumber": 1,
+                "SerialNumber": f"{self.device_id:010d}I",
+                "IsIndoor": True,
+            },
+            {
+                "Model": "MUZ-LN25VG",
+                "ModelNumber": 2,
+                "SerialNumber": f"{self.device_id:010d}O",
+                "IsIndoor": False,
+            },
+        ]
+
+    def set(self, body: dict[str, Any]) -> dict[str, Any]:
+        """Apply a SetAta or SetAtw request and return the new state."""
+        for key in _WRITABLE_KEYS[self.device_type]:
+            if key in body:
+                self.state[key] = body[key]
+        return self.get()
+
+
+class FakeMelCloud:
+    """aiohttp server imitating MELCloud."""
+
+    def __init__(
+        self,
+        *,
+        ata: int = 1,
+        atw: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        offline: int = 0,
+        seed: int = 0,
+    ) -> None:
+        """Generate the fleet. The last offline devices report being offline."""
+        rng = random.Random(seed)
+        self.devices = {
+            device_id: FakeDevice(
+                device_id,
+                DEVICE_TYPE_ATA if device_id < ata else DEVICE_TYPE_ATW,
+                rng,
+            )
+            for device_id in range(ata + atw)
+        }
+        for device_id in range(ata + atw - offline, ata + atw):
+            self.devices[device_id].state["Offline"] = True
+        # IDs of devices left out of the listing.
+        self.unlisted: set[int] = set()
+        # IDs of devices whose Device/Get is answered with 400 Bad Request.
+        self.rejected: set[int] = set()
+        # IDs of devices shared with the account, without unit information.
+        self.guests: set[int] = set()
+        # Access token accepted by the server, change it to expire sessions.
+        self.token = TOKEN
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests: Counter[str] = Counter()
+        self.request_times: list[float] = []
+        self.url: str | None = None
+        self._rng = rng
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def request_count(self) -> int:
+        """Return the number of requests served."""
+        return sum(self.requests.values())
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL for pymelcloud."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post(f"{API_PATH}/Login/ClientLogin", self._login)
+        app.router.add_get(f"{API_PATH}/User/GetUserDetails", self._user_details)
+        app.router.add_get(f"{API_PATH}/User/ListDevices", self._list_devices)
+        app.router.add_get(f"{API_PATH}/Device/Get", self._get_device)
+        app.router.add_post(f"{API_PATH}/Device/ListDeviceUnits", self._units)
+        app.router.add_post(f"{API_PATH}/Device/SetAta", self._set_device)
+        app.router.add_post(f"{API_PATH}/Device/SetAtw", self._set_device)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        sockets = site._server.sockets  # pylint: disable=protected-access
+        self.url = f"http://{host}:{sockets[0].getsockname()[1]}{API_PATH}"
+        return self.url
+
+    async def async_stop(self):
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        """Count, delay, fail and authenticate requests."""
+        self.requests[request.path.rsplit("/", 1)[-1]] += 1
+        self.request_times.append(time.monotonic())
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise web.HTTPServiceUnavailable()
+        if (
+            not request.path.endswith("/ClientLogin")
+            and request.headers.get("X-MitsContextKey") != self.token
+        ):
+            raise web.HTTPUnauthorized()
+        return await handler(request)
+
+    def _device(self, device_id) -> FakeDevice:
+        try:
+            return self.devices[int(device_id)]
+        except (KeyError, TypeError, ValueError) as err:
+            raise web.HTTPNotFound() from err
+
+    async def _login(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if body.get("Email") != USERNAME or body.get("Password") != PASSWORD:
+            return web.json_response({"ErrorId": 1, "LoginData": None})
+        return web.json_response(
+            {"ErrorId": None, "LoginData": {"ContextKey": self.token}}
+        )
+
+    async def _user_details(self, request: web.Request) -> web.Response:
+        return web.json_response({"UseFahrenheit": False, "Language": 0})
+
+    async def _list_devices(self, request: web.Request) -> web.Response:
+        buildings: dict[int, list[dict[str, Any]]] = {}
+        for device in self.devices.values():
+            if device.device_id in self.unlisted:
+                continue
+            buildings.setdefault(device.building_id, []).append(device.conf())
+        return web.json_response(
+            [
+                {
+                    "ID": building_id,
+                    "Name": f"Building {building_id}",
+                    # Spread the devices over every level of the structure.
+                    "Structure": {
+                        "Devices": confs[0::3],
+                        "Areas": [{"Devices": confs[1::3]}],
+                        "Floors": [
+                            {
+                                "Devices": confs[2::6],
+                                "Areas": [{"Devices": confs[5::6]}],
+                            }
+                        ],
+                    },
+                }
+                for building_id, confs in buildings.items()
+            ]
+        )
+
+    async def _get_device(self, request: web.Request) -> web.Response:
+        device = self._device(request.query.get("id"))
+        if device.device_id in self.rejected:
+            raise web.HTTPBadRequest()
+        return web.json_response(device.get())
+
+    async def _units(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        device = self._device(body.get("deviceId"))
+        if device.device_id in self.guests:
+            return web.json_response(None)
+        return web.json_response(device.units())
+
+    async def _set_device(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        return web.json_response(self._device(body.get("DeviceID")).set(body))
+
+
+@contextmanager
+def use_fake_melcloud(url: str) -> Iterator[None]:
+    """Send pymelcloud requests to the fake instead of MELCloud."""
+    original = pymelcloud.client.BASE_URL
+    pymelcloud.client.BASE_URL = url
+    try:
+        yield
+    finally:
+        pymelcloud.client.BASE_URL = original
+
+
+async def main(args):
+    """Serve until interrupted."""
+    fake = FakeMelCloud(
+        ata=args.ata,
+        atw=args.atw,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        offline=args.offline,
+    )
+    url = await fake.async_start(port=args.port)
+    print(f"Serving {len(fake.devices)} devices at {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake.async_stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ata", type=int, default=10, help="number of ATA devices")
+    parser.add_argument("--atw", type=int, default=2, help="number of ATW devices")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per request"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="share of requests failing"
+    )
+    parser.add_argument(
+        "--offline", type=int, default=0, help="number of offline devices"
+    )
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,109 @@
+"""Run the integration against the fake MELCloud in a bare Home Assistant.
+
+The integration is set up through a config entry like in a real installation,
+so mel_devices_setup and the platform setups all run. Run from the repository
+root with Home Assistant 2022.7 or later and the pymelcloud version of
+manifest.json installed:
+
+    python -m script.harness --ata 200 --atw 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+import os
+import sys
+import tempfile
+from typing import Any, AsyncIterator
+
+from homeassistant import bootstrap
+from homeassistant.config_entries import SOURCE_USER, ConfigEntries, ConfigEntry
+from homeassistant.const import CONF_TOKEN, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from melcloudexp.const import DOMAIN
+
+from .fake_melcloud import TOKEN, USERNAME, FakeMelCloud, use_fake_melcloud
+
+INTEGRATION_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), DOMAIN)
+
+
+@asynccontextmanager
+async def async_home_assistant() -> AsyncIterator[HomeAssistant]:
+    """Run a Home Assistant instance with the integration as a custom component."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        custom_components = os.path.join(config_dir, "custom_components")
+        os.mkdir(custom_components)
+        with open(
+            os.path.join(custom_components, "__init__.py"), "w", encoding="utf-8"
+        ):
+            pass
+        os.symlink(INTEGRATION_DIR, os.path.join(custom_components, DOMAIN))
+        sys.path.insert(0, config_dir)
+
+        hass = HomeAssistant()
+        hass.config.config_dir = config_dir
+        hass.config.skip_pip = True
+        hass.config_entries = ConfigEntries(hass, {})
+        # Renamed to load_registries in later Home Assistant versions.
+        load_registries = getattr(bootstrap, "load_registries", None) or getattr(
+            bootstrap, "async_load_base_functionality"
+        )
+        await load_registries(hass)
+        await hass.config_entries.async_initialize()
+        await hass.async_start()
+        try:
+            yield hass
+        finally:
+            for entry in hass.config_entries.async_entries():
+                await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_stop(force=True)
+            sys.path.remove(config_dir)
+            for module in [name for name in sys.modules if name.startswith("custom_")]:
+                del sys.modules[module]
+
+
+async def async_setup_integration(
+    hass: HomeAssistant, options: dict[str, Any] | None = None
+) -> ConfigEntry:
+    """Add a config entry for the fake account and wait for the setup."""
+    entry = ConfigEntry(
+        version=1,
+        domain=DOMAIN,
+        title=USERNAME,
+        data={CONF_USERNAME: USERNAME, CONF_TOKEN: TOKEN},
+        source=SOURCE_USER,
+        options=options or {},
+        unique_id=USERNAME,
+    )
+    await hass.config_entries.async_add(entry)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def main(args):
+    """Set up the integration and list the created entities."""
+    fake = FakeMelCloud(ata=args.ata, atw=args.atw, latency=args.latency)
+    url = await fake.async_start()
+    try:
+        with use_fake_melcloud(url):
+            async with async_home_assistant() as hass:
+                entry = await async_setup_integration(hass)
+                entities = Counter(state.domain for state in hass.states.async_all())
+                print(f"Config entry: {entry.state}")
+                print(f"Entities: {dict(entities)}")
+                print(f"Requests: {dict(fake.requests)}")
+    finally:
+        await fake.async_stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ata", type=int, default=10, help="number of ATA devices")
+    parser.add_argument("--atw", type=int, default=2, help="number of ATW devices")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per request"
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,332 @@
+"""Check how the integration handles failures against the fake MELCloud.
+
+Each scenario sets the integration up in a fresh Home Assistant instance,
+breaks the fake in some way and checks what reaches MELCloud. Run from the
+repository root with Home Assistant and pymelcloud installed:
+
+    python -m script.scenarios
+
+The exit code is the number of failed scenarios.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import timedelta
+import sys
+from typing import AsyncIterator, Awaitable, Callable
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import (
+    CONF_PASSWORD,
+    EVENT_HOMEASSISTANT_FINAL_WRITE,
+    STATE_UNAVAILABLE,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+
+from melcloudexp.backoff import STATE_OPEN
+from melcloudexp.const import (
+    DOMAIN,
+    REFRESH_MODE_ACCOUNT,
+    REFRESH_MODE_DEVICE,
+    UNREACHABLE_GRACE,
+)
+
+from .fake_melcloud import PASSWORD, FakeMelCloud, use_fake_melcloud
+from .harness import async_home_assistant, async_setup_integration
+
+ENTITY_ID = "climate.ata_0"
+
+
+@asynccontextmanager
+async def async_integration(
+    fake: FakeMelCloud,
+) -> AsyncIterator[tuple[HomeAssistant, object]]:
+    """Set the integration up against the fake and return its coordinator.
+
+    The coordinator is None when the setup failed.
+    """
+    url = await fake.async_start()
+    try:
+        with use_fake_melcloud(url):
+            async with async_home_assistant() as hass:
+                entry = await async_setup_integration(hass)
+                yield hass, hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    finally:
+        await fake.async_stop()
+
+
+async def async_set_temperature(hass: HomeAssistant, temperature: float):
+    """Call climate.set_temperature on the first device."""
+    await hass.services.async_call(
+        "climate",
+        "set_temperature",
+        {"entity_id": ENTITY_ID, "temperature": temperature},
+        blocking=True,
+    )
+
+
+def reset_breakers(device):
+    """Let the next request of the device through right away."""
+    device.breaker.record_success()
+    device.account.breaker.record_success()
+
+
+def check(condition: bool, message: str):
+    """Fail the scenario unless the condition holds."""
+    if not condition:
+        raise AssertionError(message)
+
+
+async def scenario_failed_write_replaced():
+    """A failed value is not replayed over a newer value written after it."""
+    fake = FakeMelCloud(ata=1, atw=0)
+    async with async_integration(fake) as (hass, coordinator):
+        device = coordinator.all_devices[0]
+        # Failed writes are retried right away and take three seconds.
+        device.breaker.base_delay = timedelta(0)
+        device.account.breaker.base_delay = timedelta(0)
+        fake.latency = 3
+        fake.error_rate = 1
+        first = hass.async_create_task(async_set_temperature(hass, 20))
+        # The first write is in flight when the second one is batched.
+        await asyncio.sleep(1.5)
+        second = hass.async_create_task(async_set_temperature(hass, 22))
+        # The first write has failed, the second one is in flight.
+        await asyncio.sleep(3.5)
+        fake.error_rate = 0
+        await asyncio.gather(first, second)
+        check(not device.queued_writes, f"still queued: {device.queued_writes}")
+
+        fake.latency = 0
+        await device.async_update()
+        await asyncio.sleep(1.5)
+        await hass.async_block_till_done()
+        temperature = fake.devices[0].state["SetTemperature"]
+        check(temperature == 22, f"MELCloud has {temperature}, expected 22")
+
+
+async def scenario_write_during_failed_write():
+    """Changes batched while a write fails are queued along with it."""
+    fake = FakeMelCloud(ata=1, atw=0)
+    async with async_integration(fake) as (hass, coordinator):
+        device = coordinator.all_devices[0]
+        fake.latency = 3
+        fake.error_rate = 1
+        first = hass.async_create_task(async_set_temperature(hass, 20))
+        # The first write is in flight when the second one is batched.
+        await asyncio.sleep(1.5)
+        await hass.services.async_call(
+            "climate",
+            "set_fan_mode",
+            {"entity_id": ENTITY_ID, "fan_mode": "3"},
+            blocking=True,
+        )
+        await first
+        check(
+            device.queued_writes == {"target_temperature": 20, "fan_speed": "3"},
+            f"queued {device.queued_writes}",
+        )
+
+
+async def scenario_write_during_outage():
+    """Changes made while MELCloud is down are queued and sent afterwards."""
+    fake = FakeMelCloud(ata=1, atw=0)
+    async with async_integration(fake) as (hass, coordinator):
+        device = coordinator.all_devices[0]
+        fake.error_rate = 1
+        await device.async_update()
+        coordinator.async_update_listeners()
+        state = hass.states.get(ENTITY_ID).state
+        check(state != STATE_UNAVAILABLE, "unavailable during a short outage")
+
+        await async_set_temperature(hass, 19)
+        check(device.queued_writes == {"target_temperature": 19}, "19 not queued")
+
+        fake.error_rate = 0
+        reset_breakers(device)
+        await device.async_update()
+        await asyncio.sleep(1.5)
+        await hass.async_block_till_done()
+        temperature = fake.devices[0].state["SetTemperature"]
+        check(temperature == 19, f"MELCloud has {temperature}, expected 19")
+
+
+async def scenario_long_outage():
+    """Devices turn unavailable after the grace period, queued changes stay."""
+    fake = FakeMelCloud(ata=1, atw=0)
+    async with async_integration(fake) as (hass, coordinator):
+        device = coordinator.all_devices[0]
+        fake.error_rate = 1
+        await device.async_update()
+        await async_set_temperature(hass, 19)
+        # pylint: disable-next=protected-access
+        device._unreachable_since -= UNREACHABLE_GRACE
+        reset_breakers(device)
+        await device.async_update()
+        coordinator.async_update_listeners()
+        state = hass.states.get(ENTITY_ID).state
+        check(state == STATE_UNAVAILABLE, f"{state} after a long outage")
+
+        fake.error_rate = 0
+        reset_breakers(device)
+        await device.async_update()
+        await asyncio.sleep(1.5)
+        await hass.async_block_till_done()
+        temperature = fake.devices[0].state["SetTemperature"]
+        check(temperature == 19, f"MELCloud has {temperature}, expected 19")
+
+
+async def scenario_account_backoff():
+    """A failing account backs off without taking probes of open devices."""
+    fake = FakeMelCloud(ata=2, atw=0)
+    async with async_integration(fake) as (_, coordinator):
+        first, second = coordinator.all_devices
+        fake.error_rate = 1
+        await first.async_update()
+        check(first.account.breaker.retry_at is not None, "account not backing off")
+
+        second.breaker.state = STATE_OPEN
+        fake.requests.clear()
+        await second.async_update()
+        check(not fake.requests, f"sent {dict(fake.requests)} while backing off")
+        check(second.breaker.state == STATE_OPEN, "probe of ATA 1 taken")
+
+
+async def scenario_device_error():
+    """A device failing with an unexpected error leaves the others alone."""
+    fake = FakeMelCloud(ata=3, atw=0)
+    async with async_integration(fake) as (hass, coordinator):
+        fake.rejected.add(0)
+        for schedule in coordinator.schedules.values():
+            schedule.next_refresh = None
+        fake.requests.clear()
+        await coordinator.async_refresh()
+        check(coordinator.last_update_success, "the refresh failed")
+        check(fake.requests["Get"] == 3, f"{fake.requests['Get']} devices fetched")
+        check(
+            all(schedule.next_refresh for schedule in coordinator.schedules.values()),
+            "refreshes not planned",
+        )
+        states = [hass.states.get(f"climate.ata_{index}").state for index in range(3)]
+        check(states[0] == STATE_UNAVAILABLE, f"failing device is {states[0]}")
+        check(STATE_UNAVAILABLE not in states[1:], f"other devices are {states[1:]}")
+
+
+async def scenario_device_added_to_empty_account():
+    """Devices added to an account without devices are picked up."""
+    fake = FakeMelCloud(ata=1, atw=0)
+    fake.unlisted.add(0)
+    async with async_integration(fake) as (hass, coordinator):
+        check(not coordinator.all_devices, "device listed during setup")
+        fake.unlisted.clear()
+        coordinator.account.conf_update_interval = timedelta(0)
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        check(hass.states.get(ENTITY_ID) is not None, "ATA 0 not added")
+
+
+async def scenario_reauth_during_setup():
+    """An entry failing setup on a rejected token is loaded after reauth."""
+    fake = FakeMelCloud(ata=1, atw=0)
+    fake.token = "rotated-token"
+    async with async_integration(fake) as (hass, _):
+        entry = hass.config_entries.async_entries(DOMAIN)[0]
+        check(entry.state is ConfigEntryState.SETUP_ERROR, f"entry {entry.state}")
+        flow = hass.config_entries.flow.async_progress()[0]
+        result = await hass.config_entries.flow.async_configure(
+            flow["flow_id"], {CONF_PASSWORD: PASSWORD}
+        )
+        check(result["reason"] == "reauth_successful", f"reauth {result}")
+        await hass.async_block_till_done()
+        check(entry.state is ConfigEntryState.LOADED, f"entry {entry.state}")
+        check(hass.states.get(ENTITY_ID) is not None, "no entities after reauth")
+
+
+async def async_reload_from_cache(hass: HomeAssistant):
+    """Save the inventory cache and reload the config entry from it."""
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+    entry = hass.config_entries.async_entries(DOMAIN)[0]
+    await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+    return hass.data[DOMAIN][entry.entry_id]
+
+
+async def scenario_removed_device():
+    """Cached devices no longer listed on the account are removed."""
+    fake = FakeMelCloud(ata=3, atw=0)
+    async with async_integration(fake) as (hass, coordinator):
+        fake.unlisted.add(2)
+        coordinator = await async_reload_from_cache(hass)
+        check(len(coordinator.all_devices) == 3, "not started from the cache")
+        for schedule in coordinator.schedules.values():
+            schedule.next_refresh = None
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        names = [device.name for device in coordinator.all_devices]
+        check(names == ["ATA 0", "ATA 1"], f"devices {names}")
+        check(hass.states.get("climate.ata_2") is None, "entity of ATA 2 left")
+        registry = dr.async_get(hass)
+        check(
+            not any(device.name == "ATA 2" for device in registry.devices.values()),
+            "registry device of ATA 2 left",
+        )
+
+        coordinator = await async_reload_from_cache(hass)
+        names = [device.name for device in coordinator.all_devices]
+        check(names == ["ATA 0", "ATA 1"], f"cached devices {names}")
+
+
+async def scenario_guest_device_units():
+    """Unit information missing for a device is asked for once per mode."""
+    fake = FakeMelCloud(ata=2, atw=0)
+    fake.guests.add(1)
+    async with async_integration(fake) as (_, coordinator):
+        for mode in (REFRESH_MODE_ACCOUNT, REFRESH_MODE_DEVICE):
+            coordinator.refresh_mode = mode
+            fake.requests.clear()
+            for _ in range(3):
+                for schedule in coordinator.schedules.values():
+                    schedule.next_refresh = None
+                await coordinator.async_refresh()
+            units = fake.requests["ListDeviceUnits"]
+            check(units <= 2, f"{units} unit requests in {mode} mode")
+            for device in coordinator.all_devices:
+                # pylint: disable-next=protected-access
+                device.device._device_units = None
+
+
+SCENARIOS: dict[str, Callable[[], Awaitable[None]]] = {
+    name[len("scenario_") :]: scenario
+    for name, scenario in globals().items()
+    if name.startswith("scenario_")
+}
+
+
+async def main(args) -> int:
+    """Run the scenarios and return the number of failures."""
+    failures = 0
+    for name in args.scenarios or SCENARIOS:
+        try:
+            await SCENARIOS[name]()
+        except AssertionError as err:
+            failures += 1
+            print(f"FAIL {name}: {err}")
+        else:
+            print(f"ok   {name}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "scenarios", nargs="*", help=f"scenarios to run: {', '.join(SCENARIOS)}"
+    )
+    arguments = parser.parse_args()
+    unknown = set(arguments.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    sys.exit(asyncio.run(main(arguments)))